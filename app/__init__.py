@@ -4,8 +4,14 @@ Flask application factory and initialization.
 from flask import Flask, render_template
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from jinja2 import FileSystemBytecodeCache
 from app.config import config
 from app.models import db, User
+from app.utils import OrjsonProvider
+import logging
+import os
+
+logger = logging.getLogger(__name__)
 
 login_manager = LoginManager()
 migrate = Migrate()
@@ -14,13 +20,45 @@ migrate = Migrate()
 @login_manager.user_loader
 def load_user(user_id):
     """Load user by ID for Flask-Login."""
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
+
+
+def _jinja_bytecode_cache(cache_dir):
+    """
+    Build the on-disk cache for compiled templates.
+
+    Cached entries are loaded with marshal and executed, so the directory must
+    belong to this user and not be writable by anyone else.
+
+    Args:
+        cache_dir: Directory to cache in, or None for Jinja's per-user default
+
+    Returns:
+        FileSystemBytecodeCache, or None if cache_dir isn't safe to use
+    """
+    if cache_dir is None:
+        # Jinja creates this one with mode 0700 and checks its owner
+        return FileSystemBytecodeCache()
+
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    st = os.stat(cache_dir)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        logger.error(f"Not caching templates in {cache_dir}: it must be owned by this user "
+                     f"and not writable by group or others")
+        return None
+    return FileSystemBytecodeCache(cache_dir)
 
 
 def create_app(config_name='default'):
     """Create and configure the Flask application."""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.json = OrjsonProvider(app)
+
+    # Reuse compiled templates across workers and restarts; templates are
+    # edited live in debug mode, so leave it uncached there
+    if app.config.get('JINJA_BYTECODE_CACHE') and not app.debug:
+        app.jinja_env.bytecode_cache = _jinja_bytecode_cache(app.config.get('JINJA_BYTECODE_CACHE_DIR'))
 
     # Initialize extensions
     db.init_app(app)
@@ -68,7 +106,17 @@ def create_app(config_name='default'):
     @app.cli.command('db-upgrade')
     def db_upgrade():
         """Apply database migrations."""
-        from flask_migrate import upgrade
+        from flask_migrate import stamp, upgrade
+        from sqlalchemy import inspect
+
+        if not inspect(db.engine).has_table(User.__tablename__):
+            # Fresh database: migrations only alter existing tables, so build the
+            # current schema and mark every revision as applied
+            db.create_all()
+            stamp()
+            print("✓ Database schema created!")
+            return
+
         upgrade()
         print("✓ Database migrations applied successfully!")
 
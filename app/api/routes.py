@@ -1,19 +1,38 @@
 """
 REST API routes for programmatic access.
 """
-from flask import jsonify, request
+from flask import Response, current_app, jsonify, request
 from flask_login import login_required, current_user
 from app.api import api
-from app.models import Server
+from app.models import db, Server
+from app.utils import user_server_or_404
+from sqlalchemy import select
+import orjson
+
+# Columns read by Server.row_to_dict; listings fetch just these as plain rows
+_SERVER_LIST_COLUMNS = (
+    Server.id, Server.name, Server.server_type, Server.server_version, Server.status,
+    Server.cpu_cores, Server.ram_mb, Server.disk_gb, Server.created_at, Server.pod_name,
+)
+
+# Probed constantly by Kubernetes; encode once at import
+_HEALTH_BODY = orjson.dumps({
+    'status': 'healthy',
+    'service': 'server-panel-api'
+})
 
 
 @api.route('/servers', methods=['GET'])
 @login_required
 def list_servers():
     """List all servers for the current user."""
-    servers = current_user.servers.all()
+    rows = db.session.execute(
+        select(*_SERVER_LIST_COLUMNS)
+        .where(Server.owner_id == current_user.id)
+        .order_by(Server.id)
+    )
     return jsonify({
-        'servers': [server.to_dict() for server in servers]
+        'servers': [Server.row_to_dict(row) for row in rows]
     })
 
 
@@ -21,12 +40,7 @@ def list_servers():
 @login_required
 def get_server(server_id):
     """Get details of a specific server."""
-    server = Server.query.get_or_404(server_id)
-
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
-
+    server = user_server_or_404(server_id)
     return jsonify(server.to_dict())
 
 
@@ -38,10 +52,15 @@ def get_usage():
     return jsonify(usage)
 
 
+@api.route('/plans', methods=['GET'])
+def list_plans():
+    """List the available resource plans."""
+    return Response(current_app.config['RESOURCE_PLANS_JSON'], mimetype='application/json',
+                    headers={'Cache-Control': 'public, max-age=300'})
+
+
 @api.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'server-panel-api'
-    })
+    return Response(_HEALTH_BODY, mimetype='application/json',
+                    headers={'Cache-Control': 'public, max-age=5'})
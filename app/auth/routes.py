@@ -3,10 +3,20 @@ Authentication routes for login, registration, and logout.
 """
 from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
+from urllib.parse import urlsplit
+from sqlalchemy import select
 from app.auth import auth
 from app.models import db, User
 
 
+def _is_safe_next(url: str) -> bool:
+    """Check that a post-login redirect target is a path on this site."""
+    if not url or len(url) > 512 or '\\' in url:
+        return False
+    parts = urlsplit(url)
+    return not parts.scheme and not parts.netloc and parts.path.startswith('/')
+
+
 @auth.route('/login', methods=['GET', 'POST'])
 def login():
     """User login."""
@@ -25,15 +35,19 @@ def login():
             return render_template('auth/login.html')
 
         # Find user
-        user = User.query.filter_by(email=email).first()
+        user = db.session.execute(select(User).where(User.email == email)).scalar_one_or_none()
 
         if user and user.check_password(password):
+            if db.session.is_modified(user):
+                # check_password upgraded a legacy password hash
+                db.session.commit()
+
             login_user(user, remember=remember)
             flash(f'Welcome back, {email}!', 'success')
 
             # Redirect to next page or dashboard
             next_page = request.args.get('next')
-            if next_page and next_page.startswith('/'):
+            if _is_safe_next(next_page):
                 return redirect(next_page)
             return redirect(url_for('servers.dashboard'))
         else:
@@ -68,7 +82,7 @@ def register():
             return render_template('auth/register.html')
 
         # Check if email already exists
-        if User.query.filter_by(email=email).first():
+        if db.session.execute(select(User.id).where(User.email == email)).first():
             flash('Email already registered.', 'error')
             return redirect(url_for('auth.register'))
 
@@ -77,6 +91,10 @@ def register():
             user = User(email=email)
             user.set_password(password)
             db.session.add(user)
+            db.session.flush()  # assigns user.id for the namespace
+
+            # Persist the namespace in the same transaction as the new user
+            user.k8s_namespace = user.get_namespace()
             db.session.commit()
 
             flash('Registration successful! Please log in.', 'success')
@@ -3,6 +3,27 @@ Configuration classes for the Flask application.
 """
 import os
 from datetime import timedelta
+from types import MappingProxyType
+
+import orjson
+
+_RESOURCE_PLANS = {
+    'small': {
+        'cpu_cores': 1,
+        'ram_mb': 2048,
+        'disk_gb': 10
+    },
+    'medium': {
+        'cpu_cores': 2,
+        'ram_mb': 4096,
+        'disk_gb': 20
+    },
+    'large': {
+        'cpu_cores': 4,
+        'ram_mb': 8192,
+        'disk_gb': 40
+    }
+}
 
 
 class Config:
@@ -26,6 +47,20 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
 
+    # Argon2id password hashing cost (OWASP baseline: 2 passes over 19 MiB);
+    # older werkzeug hashes and hashes with other costs are upgraded on login
+    ARGON2_TIME_COST = 2
+    ARGON2_MEMORY_COST = 19456  # KiB
+
+    # Remember password verification results for a few minutes so repeat
+    # logins skip the deliberately slow hash (keyed by SHA-256, never plaintext)
+    USE_VERIFY_PASSWORD_CACHE = os.environ.get('USE_VERIFY_PASSWORD_CACHE', 'false').lower() == 'true'
+
+    # Cache compiled Jinja templates on disk, shared by all workers; debug mode
+    # never uses it. Without a directory, Jinja's private per-user one is used.
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', 'true').lower() == 'true'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+
     # Kubernetes
     K8S_NAMESPACE = os.environ.get('K8S_NAMESPACE') or 'game-servers'
     K8S_IN_CLUSTER = os.environ.get('K8S_IN_CLUSTER', 'false').lower() == 'true'
@@ -35,24 +70,11 @@ class Config:
     DEFAULT_RAM_QUOTA = 16  # GB
     DEFAULT_MAX_SERVERS = 5
 
-    # Resource plans
-    RESOURCE_PLANS = {
-        'small': {
-            'cpu_cores': 1,
-            'ram_mb': 2048,
-            'disk_gb': 10
-        },
-        'medium': {
-            'cpu_cores': 2,
-            'ram_mb': 4096,
-            'disk_gb': 20
-        },
-        'large': {
-            'cpu_cores': 4,
-            'ram_mb': 8192,
-            'disk_gb': 40
-        }
-    }
+    # Resource plans (read-only; RESOURCE_PLANS_JSON is the pre-encoded form for the API)
+    RESOURCE_PLANS = MappingProxyType({
+        name: MappingProxyType(resources) for name, resources in _RESOURCE_PLANS.items()
+    })
+    RESOURCE_PLANS_JSON = orjson.dumps(_RESOURCE_PLANS)
 
 
 class DevelopmentConfig(Config):
@@ -73,6 +95,10 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    JINJA_BYTECODE_CACHE = False
+    # Cheapest parameters argon2 accepts; hashes stay Argon2id
+    ARGON2_TIME_COST = 1
+    ARGON2_MEMORY_COST = 8
 
 
 config = {
@@ -1,31 +1,36 @@
 """
 Console routes for WebSocket-based server console access.
 """
-from flask import render_template, redirect, url_for, flash
-from flask_login import login_required, current_user
+from flask import render_template
+from flask_login import login_required
 from app.console import console
-from app.models import Server
-from app.servers.kubernetes_client import KubernetesClient
+from app.utils import user_server_or_404
+from app.servers.kubernetes_client import k8s
+from cachetools import TTLCache, cached
+from threading import Lock
 import logging
 
 logger = logging.getLogger(__name__)
-k8s = KubernetesClient()
+
+# Console pages poll logs every few seconds; serve repeat hits from memory briefly
+_log_cache = TTLCache(maxsize=2048, ttl=2.0)
+
+
+@cached(_log_cache, lock=Lock())
+def get_cached_logs(pod_name: str, namespace: str, tail_lines: int = 100) -> str:
+    """Get recent pod logs, cached per pod for a couple of seconds."""
+    return k8s.get_server_logs(pod_name, namespace, tail_lines=tail_lines)
 
 
 @console.route('/<int:server_id>')
 @login_required
 def view(server_id):
     """View server console."""
-    server = Server.query.get_or_404(server_id)
-
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        flash('You do not have permission to access this server console.', 'error')
-        return redirect(url_for('servers.dashboard'))
+    server = user_server_or_404(server_id)
 
     # Get recent logs
     try:
-        logs = k8s.get_server_logs(server.pod_name, server.namespace, tail_lines=100) if server.pod_name and server.namespace else "Server not running."
+        logs = get_cached_logs(server.pod_name, server.namespace, tail_lines=100) if server.pod_name and server.namespace else "Server not running."
     except Exception as e:
         logger.error(f"Error fetching logs for server {server_id}: {e}")
         logs = f"Error fetching logs: {str(e)}"
@@ -37,14 +42,10 @@ def view(server_id):
 @login_required
 def logs(server_id):
     """Get server logs (AJAX endpoint)."""
-    server = Server.query.get_or_404(server_id)
-
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        return {'error': 'Unauthorized'}, 403
+    server = user_server_or_404(server_id)
 
     try:
-        logs = k8s.get_server_logs(server.pod_name, server.namespace, tail_lines=100) if server.pod_name and server.namespace else "Server not running."
+        logs = get_cached_logs(server.pod_name, server.namespace, tail_lines=100) if server.pod_name and server.namespace else "Server not running."
         return {'logs': logs}
     except Exception as e:
         logger.error(f"Error fetching logs for server {server_id}: {e}")
@@ -1,28 +1,32 @@
 """
 File management routes for browsing and editing server files.
 """
-from flask import render_template, redirect, url_for, flash, request, jsonify
-from flask_login import login_required, current_user
+from flask import render_template, request, jsonify
+from flask_login import login_required
 from app.files import files
-from app.models import Server
-from app.servers.kubernetes_client import KubernetesClient
+from app.utils import user_server_or_404
+from app.servers.kubernetes_client import k8s
 import logging
 import os
+import re
 
 logger = logging.getLogger(__name__)
-k8s = KubernetesClient()
+
+# A '..' path segment or an embedded NUL byte
+_BAD_PATH = re.compile(r'(^|/)\.\.(/|$)|\x00')
+
+
+def _valid_path(path) -> bool:
+    """Check that a client-supplied pod path is absolute and can't traverse upwards."""
+    return (isinstance(path, str) and 0 < len(path) < 4096
+            and path.startswith('/') and not _BAD_PATH.search(path))
 
 
 @files.route('/<int:server_id>/browser')
 @login_required
 def browser(server_id):
     """File browser interface."""
-    server = Server.query.get_or_404(server_id)
-
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        flash('You do not have permission to access this server files.', 'error')
-        return redirect(url_for('servers.dashboard'))
+    server = user_server_or_404(server_id)
 
     return render_template('files/browser.html', server=server)
 
@@ -31,21 +35,17 @@ def browser(server_id):
 @login_required
 def list_files(server_id):
     """List files in a directory (AJAX endpoint)."""
-    server = Server.query.get_or_404(server_id)
-
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
+    server = user_server_or_404(server_id)
 
     path = request.args.get('path', '/data')
 
     # Security: prevent path traversal
-    if '..' in path:
+    if not _valid_path(path):
         return jsonify({'error': 'Invalid path'}), 400
 
     try:
         output = k8s.list_files(server.pod_name, path, server.namespace)
-        files_list = parse_ls_output(output)
+        files_list = parse_find_output(output)
         return jsonify({'files': files_list, 'path': path})
 
     except Exception as e:
@@ -57,18 +57,14 @@ def list_files(server_id):
 @login_required
 def read_file(server_id):
     """Read a file (AJAX endpoint)."""
-    server = Server.query.get_or_404(server_id)
-
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
+    server = user_server_or_404(server_id)
 
     filepath = request.args.get('path')
     if not filepath:
         return jsonify({'error': 'Path required'}), 400
 
     # Security: prevent path traversal
-    if '..' in filepath:
+    if not _valid_path(filepath):
         return jsonify({'error': 'Invalid path'}), 400
 
     try:
@@ -84,21 +80,20 @@ def read_file(server_id):
 @login_required
 def write_file(server_id):
     """Write to a file (AJAX endpoint)."""
-    server = Server.query.get_or_404(server_id)
+    server = user_server_or_404(server_id)
 
-    # Check permission
-    if server.owner_id != current_user.id and not current_user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object body required'}), 400
 
-    data = request.get_json()
     filepath = data.get('path')
     content = data.get('content')
 
-    if not filepath or content is None:
+    if not filepath or not isinstance(content, str):
         return jsonify({'error': 'Path and content required'}), 400
 
     # Security: prevent path traversal
-    if '..' in filepath:
+    if not _valid_path(filepath):
         return jsonify({'error': 'Invalid path'}), 400
 
     try:
@@ -110,30 +105,24 @@ def write_file(server_id):
         return jsonify({'error': str(e)}), 500
 
 
-def parse_ls_output(output: str) -> list:
-    """Parse ls -la output into structured data."""
-    lines = output.strip().split('\n')
-    if len(lines) <= 1:
-        return []
-
+def parse_find_output(output: str) -> list:
+    """Parse list_files output (NUL-terminated find -printf records) into structured data."""
     files_list = []
-    for line in lines[1:]:  # Skip 'total' line
-        parts = line.split(maxsplit=8)
-        if len(parts) < 9:
+    for record in output.split('\0')[:-1]:
+        fields = record.split('\t', 4)
+        if len(fields) < 5:
             continue
 
-        perms, _, owner, group, size, date, time, _, name = parts
-
-        # Skip . and ..
-        if name in ['.', '..']:
-            continue
+        file_type, size, modified, perms, name = fields
+        is_dir = file_type == 'd'
 
         files_list.append({
             'name': name,
-            'is_dir': perms.startswith('d'),
-            'size': int(size) if not perms.startswith('d') else 0,
-            'modified': f"{date} {time}",
+            'is_dir': is_dir,
+            'size': int(size) if not is_dir else 0,
+            'modified': modified[:19],  # drop fractional seconds
             'permissions': perms
         })
 
+    files_list.sort(key=lambda f: f['name'])
     return files_list
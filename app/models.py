@@ -2,14 +2,47 @@
 Database models for the game server panel.
 """
 from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-import re
+from sqlalchemy import case, func, select
+from werkzeug.security import check_password_hash
+import hashlib
+import string
 
 db = SQLAlchemy()
 
 
+@lru_cache(maxsize=4)
+def _build_password_hasher(time_cost: int, memory_cost: int) -> PasswordHasher:
+    """Build an Argon2id hasher; cached so each cost setting is built once."""
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=1)
+
+
+def _password_hasher() -> PasswordHasher:
+    """Get the hasher for the current app's ARGON2_* cost settings."""
+    return _build_password_hasher(
+        current_app.config['ARGON2_TIME_COST'],
+        current_app.config['ARGON2_MEMORY_COST'],
+    )
+
+
+# (password hash, SHA-256 of candidate) -> result; see Config.USE_VERIFY_PASSWORD_CACHE
+_password_verify_cache = TTLCache(maxsize=4096, ttl=300)
+_password_verify_lock = Lock()
+
+# Deletes every ASCII character that isn't allowed in a Kubernetes resource name
+_K8S_NAME_TABLE = str.maketrans('', '', ''.join(
+    chr(c) for c in range(128)
+    if chr(c) not in string.ascii_lowercase + string.digits + '-'
+))
+
+
 class User(UserMixin, db.Model):
     """User model for authentication and resource quota management."""
 
@@ -30,31 +63,66 @@ class User(UserMixin, db.Model):
     k8s_namespace = db.Column(db.String(63))  # K8s namespace max length
 
     # Relationships
-    servers = db.relationship('Server', backref='owner', lazy='dynamic',
+    servers = db.relationship('Server', back_populates='owner', lazy='select',
                             cascade='all, delete-orphan')
+    server_permissions = db.relationship('ServerPermission', back_populates='user')
+    audit_logs = db.relationship('AuditLog', back_populates='user')
 
     def get_namespace(self) -> str:
-        """Get or generate Kubernetes namespace for this user."""
-        if not self.k8s_namespace:
-            # Generate namespace: user-{id}
-            self.k8s_namespace = f"user-{self.id}"
-            db.session.commit()
-        return self.k8s_namespace
+        """Get Kubernetes namespace for this user (derived as user-{id} if not stored)."""
+        return self.k8s_namespace or f"user-{self.id}"
 
     def set_password(self, password: str) -> None:
         """Hash and set the user's password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = _password_hasher().hash(password)
 
     def check_password(self, password: str) -> bool:
-        """Check if provided password matches the hash."""
-        return check_password_hash(self.password_hash, password)
+        """
+        Check if provided password matches the hash.
+
+        Legacy werkzeug hashes and Argon2 hashes with outdated parameters are
+        replaced on success; the caller is responsible for committing.
+        """
+        if not current_app.config.get('USE_VERIFY_PASSWORD_CACHE'):
+            return self._verify_password(password)
+
+        key = (self.password_hash, hashlib.sha256(password.encode()).hexdigest())
+        with _password_verify_lock:
+            result = _password_verify_cache.get(key)
+        if result is None:
+            result = self._verify_password(password)
+            with _password_verify_lock:
+                _password_verify_cache[key] = result
+        return result
+
+    def _verify_password(self, password: str) -> bool:
+        """Verify password against the stored hash, rehashing it if outdated."""
+        if not self.password_hash.startswith('$argon2'):
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        hasher = _password_hasher()
+        try:
+            hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+        if hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def get_resource_usage(self) -> dict:
         """Calculate current resource usage across all servers."""
-        running_servers = self.servers.filter_by(status='running').all()
-        total_cpu = sum(server.cpu_cores for server in running_servers)
-        total_ram = sum(server.ram_mb for server in running_servers)
-        server_count = self.servers.count()
+        running = Server.status == 'running'
+        total_cpu, total_ram, server_count = db.session.execute(
+            select(
+                func.coalesce(func.sum(case((running, Server.cpu_cores), else_=0)), 0),
+                func.coalesce(func.sum(case((running, Server.ram_mb), else_=0)), 0),
+                func.count(Server.id),
+            ).where(Server.owner_id == self.id)
+        ).one()
 
         return {
             'cpu_used': total_cpu,
@@ -90,6 +158,11 @@ class Server(db.Model):
     """Server model representing a game server instance."""
 
     __tablename__ = 'servers'
+    __table_args__ = (
+        # Covers the per-owner quota aggregate in User.get_resource_usage
+        db.Index('ix_servers_owner_status', 'owner_id', 'status',
+                 postgresql_include=['cpu_cores', 'ram_mb']),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -106,7 +179,8 @@ class Server(db.Model):
 
     # Kubernetes identifiers
     namespace = db.Column(db.String(63))  # K8s namespace
-    pod_name = db.Column(db.String(255))
+    k8s_name = db.Column(db.String(63), index=True)  # StatefulSet/Service name
+    pod_name = db.Column(db.String(255), index=True)
     pvc_name = db.Column(db.String(255))
     service_name = db.Column(db.String(255))
 
@@ -117,33 +191,41 @@ class Server(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    permissions = db.relationship('ServerPermission', backref='server', lazy='dynamic',
+    owner = db.relationship('User', back_populates='servers')
+    permissions = db.relationship('ServerPermission', back_populates='server', lazy='raise',
                                 cascade='all, delete-orphan')
 
     @staticmethod
     def generate_k8s_name(owner_id: int, server_name: str) -> str:
         """Generate Kubernetes-compliant resource name."""
         # K8s names must be lowercase alphanumeric + hyphens, max 63 chars
-        safe_name = re.sub(r'[^a-z0-9-]', '', server_name.lower().replace(' ', '-'))
+        safe_name = (server_name.lower().replace(' ', '-')
+                     .encode('ascii', 'ignore').decode('ascii')
+                     .translate(_K8S_NAME_TABLE))
         return f"mc-{owner_id}-{safe_name}"[:63]
 
-    def to_dict(self) -> dict:
-        """Serialize server for API responses."""
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        """Serialize a Server, or a row selecting the same column names, for API responses."""
         return {
-            'id': self.id,
-            'name': self.name,
-            'type': self.server_type,
-            'version': self.server_version,
-            'status': self.status,
+            'id': row.id,
+            'name': row.name,
+            'type': row.server_type,
+            'version': row.server_version,
+            'status': row.status,
             'resources': {
-                'cpu': self.cpu_cores,
-                'ram_mb': self.ram_mb,
-                'disk_gb': self.disk_gb
+                'cpu': row.cpu_cores,
+                'ram_mb': row.ram_mb,
+                'disk_gb': row.disk_gb
             },
-            'created_at': self.created_at.isoformat(),
-            'pod_name': self.pod_name
+            'created_at': row.created_at,  # ISO 8601 via the app's orjson provider
+            'pod_name': row.pod_name
         }
 
+    def to_dict(self) -> dict:
+        """Serialize server for API responses."""
+        return Server.row_to_dict(self)
+
     def __repr__(self):
         return f'<Server {self.name}>'
 
@@ -167,7 +249,8 @@ class ServerPermission(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user = db.relationship('User', backref='server_permissions')
+    server = db.relationship('Server', back_populates='permissions')
+    user = db.relationship('User', back_populates='server_permissions', lazy='selectin')
 
     def __repr__(self):
         return f'<ServerPermission user={self.user_id} server={self.server_id}>'
@@ -213,7 +296,7 @@ class AuditLog(db.Model):
     ip_address = db.Column(db.String(45))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user = db.relationship('User', backref='audit_logs')
+    user = db.relationship('User', back_populates='audit_logs', lazy='raise')
 
     def __repr__(self):
         return f'<AuditLog {self.action} by user={self.user_id}>'
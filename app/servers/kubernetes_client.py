@@ -1,20 +1,133 @@
 """
 Kubernetes client for managing game server resources.
 """
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
-from kubernetes.stream import stream
+from cachetools import TTLCache
+from concurrent import futures
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from flask import current_app
+from urllib3.util.retry import Retry
+from types import MappingProxyType
+from werkzeug.local import LocalProxy
+import codecs
+import copy
+import functools
+import orjson
 import os
 import logging
+import shlex
+import threading
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# The kubernetes package takes a few hundred milliseconds to import, so it is
+# only loaded once a client is created (see _load_kubernetes). Everything
+# below that uses these names runs on a KubernetesClient instance.
+client = config = watch = stream = ApiException = None
 
-class KubernetesClient:
-    """Client for interacting with Kubernetes API to manage game servers."""
 
-    def __init__(self):
-        """Initialize Kubernetes client."""
+def _load_kubernetes() -> None:
+    """Import the kubernetes package into this module's globals on first use."""
+    global client, config, watch, stream, ApiException
+    if ApiException is None:
+        from kubernetes import client, config, watch
+        from kubernetes.stream import stream
+        from kubernetes.client.rest import ApiException
+
+
+# Runs independent Kubernetes API calls concurrently (bounded to limit API server load)
+_api_executor = futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv('K8S_API_CONCURRENCY', '8')),
+    thread_name_prefix='k8s-api'
+)
+
+# find -printf format for list_files: type, size, mtime, permissions, name.
+# Raw string: find expands the \t and \0 escapes itself (argv can't carry NUL bytes).
+LIST_FILES_FORMAT = r'%y\t%s\t%TY-%Tm-%Td %TH:%TM:%TS\t%M\t%f\0'
+
+# Docker image per server type
+_DEFAULT_IMAGE = 'itzg/minecraft-server:latest'
+_IMAGES = MappingProxyType({
+    'vanilla': 'itzg/minecraft-server:latest',
+    'paper': 'itzg/minecraft-server:latest',
+    'spigot': 'itzg/minecraft-server:latest',
+    'forge': 'itzg/minecraft-server:latest',
+    'fabric': 'itzg/minecraft-server:latest'
+})
+
+# Default cap on the bytes of log output fetched per request
+LOG_LIMIT_BYTES = 65536
+
+# Seconds a pod status read from the API is reused
+STATUS_CACHE_TTL = 5
+
+# Page size for pod listings
+POD_LIST_PAGE_SIZE = 500
+
+# Seconds to wait before re-establishing a failed pod watch
+POD_WATCH_RETRY_DELAY = 5
+
+# Seconds between full relistings of a watched namespace, which repair any
+# events the watch missed
+POD_RELIST_INTERVAL = 60
+
+# Seconds without a status lookup after which a namespace's pod watch stops,
+# so namespaces nobody is looking at don't hold a watch (and a pooled
+# connection) for the life of the process
+POD_WATCH_IDLE = 300
+
+# Seconds to wait for an exec fed through stdin to finish
+EXEC_STDIN_TIMEOUT = 60
+
+# Seconds an unused shell session is kept open for further commands
+SHELL_SESSION_IDLE = 60
+
+# Seconds to wait for a command run in a shell session
+SHELL_COMMAND_TIMEOUT = 60
+
+
+# Back off on API server throttling (429, honouring Retry-After) and transient
+# gateway errors; urllib3 only retries idempotent methods, never POST/PATCH.
+# Once retries run out the last response is returned rather than raised as
+# MaxRetryError, so callers still get an ApiException with its status.
+API_RETRY = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=(429, 502, 503, 504),
+    raise_on_status=False,
+)
+
+# Process-wide ApiClients, built on first use. Guarded by a lock so threads
+# or greenlets racing to create the first KubernetesClient can't each build
+# their own pool.
+_api_client = None
+_stream_api_client = None
+_api_client_lock = threading.RLock()
+
+
+def _default_pool_maxsize() -> int:
+    """Connection pool size: at least 32, more on machines with many cores."""
+    return max(32, 4 * (os.cpu_count() or 1))
+
+
+def _get_api_client() -> 'client.ApiClient':
+    """
+    Load cluster configuration and build the ApiClient shared by every KubernetesClient.
+
+    Config is parsed and the connection pool created once per process. The
+    kubernetes client is safe to share across threads/greenlets for the
+    independent request/response calls made here.
+    """
+    global _api_client
+    if _api_client is not None:
+        return _api_client
+
+    with _api_client_lock:
+        if _api_client is not None:
+            return _api_client
+
         # Load config based on environment
         if os.getenv('K8S_IN_CLUSTER', 'false').lower() == 'true':
             config.load_incluster_config()
@@ -24,11 +137,201 @@ class KubernetesClient:
             except Exception as e:
                 logger.warning(f"Could not load kube config: {e}. Using default configuration.")
 
-        self.core_api = client.CoreV1Api()
-        self.apps_api = client.AppsV1Api()
-        self.rbac_api = client.RbacAuthorizationV1Api()
+        # One urllib3 pool shared by all API groups, sized so concurrent
+        # greenlets reuse keep-alive connections instead of queueing
+        configuration = client.Configuration.get_default_copy()
+        configuration.connection_pool_maxsize = int(
+            os.getenv('K8S_POOL_MAXSIZE', str(_default_pool_maxsize()))
+        )
+        configuration.retries = API_RETRY
+        api_client = client.ApiClient(configuration)
+        # Let the API server compress large responses (pod listings, logs);
+        # urllib3 decompresses them transparently
+        api_client.set_default_header('Accept-Encoding', 'gzip')
+        _api_client = api_client
+        return _api_client
+
+
+def _get_stream_api_client() -> 'client.ApiClient':
+    """
+    Build the ApiClient used for exec streams.
+
+    kubernetes.stream.stream swaps the ApiClient's request method for a
+    websocket one while it runs. Doing that on the shared client would send
+    concurrent regular API calls over websockets, so streams get their own.
+    """
+    global _stream_api_client
+    if _stream_api_client is not None:
+        return _stream_api_client
+
+    with _api_client_lock:
+        if _stream_api_client is None:
+            _stream_api_client = client.ApiClient(_get_api_client().configuration)
+        return _stream_api_client
+
+
+@dataclass(frozen=True, slots=True)
+class ServerNames:
+    """Kubernetes object names and labels derived from a server's name."""
+
+    server_name: str
+    pod_name: str
+    pvc_name: str
+    service_name: str
+    labels: MappingProxyType
+
+    @classmethod
+    def for_server(cls, server_name: str) -> 'ServerNames':
+        """Derive every name for the StatefulSet called server_name."""
+        return cls(
+            server_name=server_name,
+            pod_name=f"{server_name}-0",
+            # Claims from volumeClaimTemplates are named <template>-<statefulset>-<ordinal>
+            pvc_name=f"data-{server_name}-0",
+            service_name=server_name,
+            labels=MappingProxyType({"app": "minecraft", "server": server_name}),
+        )
+
+
+class _ShellSession:
+    """
+    A long-lived sh in a pod that runs commands written to its stdin.
+
+    Each command's output is followed by a random marker, which tells where
+    the output ends without closing the stream. The lock is held by whoever
+    is running a command.
+    """
+
+    def __init__(self):
+        self.ws = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def run(self, command: list, timeout: float) -> str:
+        """Run command and return its combined stdout and stderr."""
+        # Pick up a close frame sent while the session sat idle
+        self.ws.update(timeout=0)
+        if not self.ws.is_open():
+            raise ConnectionError("Shell session closed")
+
+        marker = uuid.uuid4().hex
+        self.ws.write_stdin(f"{shlex.join(command)} </dev/null 2>&1; echo {marker}\n")
+
+        output = ''
+        deadline = time.monotonic() + timeout
+        while (end := output.find(marker)) == -1:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.ws.is_open():
+                raise ConnectionError("Shell session stopped responding")
+            output += self.ws.read_stdout(timeout=remaining)
+
+        # Drop the copy of everything received that the client keeps
+        self.ws.read_all()
+        self.last_used = time.monotonic()
+        return output[:end]
+
+    def close(self) -> None:
+        """Close the underlying stream, if open."""
+        if self.ws is not None:
+            self.ws.close()
+            self.ws = None
+
+
+@functools.lru_cache(maxsize=64)
+def _build_statefulset_manifest(image: str, server_type: str, server_version: str,
+                                cpu_cores, ram_mb: int, disk_gb: int) -> dict:
+    """
+    Build the StatefulSet body shared by every server on the same plan.
+
+    Returns a plain dict in the v1 StatefulSet schema; the API client
+    serializes it as-is. The name, service name and labels are left out and
+    must be filled in on a copy, since the result is cached.
+    """
+    resources = {
+        'cpu': f"{cpu_cores}",
+        'memory': f"{ram_mb}Mi"
+    }
+
+    # Container definition
+    container = {
+        'name': "minecraft",
+        'image': image,
+        'ports': [{'containerPort': 25565, 'name': "minecraft"}],
+        'env': [
+            {'name': "EULA", 'value': "TRUE"},
+            {'name': "TYPE", 'value': server_type.upper()},
+            {'name': "VERSION", 'value': server_version},
+            {'name': "MEMORY", 'value': f"{ram_mb}M"},
+            {'name': "JVM_OPTS", 'value': f"-Xms{ram_mb}M -Xmx{ram_mb}M"},
+        ],
+        'resources': {
+            'requests': dict(resources),
+            'limits': dict(resources)
+        },
+        'volumeMounts': [
+            {'name': "data", 'mountPath': "/data"}
+        ]
+    }
+
+    # VolumeClaimTemplate
+    volume_claim_template = {
+        'metadata': {'name': "data"},
+        'spec': {
+            'accessModes': ["ReadWriteOnce"],
+            'resources': {
+                'requests': {'storage': f"{disk_gb}Gi"}
+            }
+        }
+    }
+
+    return {
+        'apiVersion': "apps/v1",
+        'kind': "StatefulSet",
+        'spec': {
+            'replicas': 1,
+            'template': {
+                'spec': {'containers': [container]}
+            },
+            'volumeClaimTemplates': [volume_claim_template]
+        }
+    }
+
+
+class KubernetesClient:
+    """Client for interacting with Kubernetes API to manage game servers."""
+
+    def __init__(self):
+        """Initialize Kubernetes client."""
+        _load_kubernetes()
+        api_client = _get_api_client()
+        self.core_api = client.CoreV1Api(api_client)
+        self.apps_api = client.AppsV1Api(api_client)
+        self.rbac_api = client.RbacAuthorizationV1Api(api_client)
+        self.stream_api = client.CoreV1Api(_get_stream_api_client())
         self.default_namespace = os.getenv('K8S_NAMESPACE', 'game-servers')
 
+        # Namespaces seen to exist; expire so externally deleted ones get re-created
+        self._known_namespaces = TTLCache(maxsize=1024, ttl=600)
+
+        # Pod phases kept current by one background watch per namespace,
+        # started the first time a namespace's status is asked for and
+        # stopped once it goes unused. A namespace is synced once its first
+        # full listing has been loaded.
+        self._pod_phases = {}
+        self._pod_watch_synced = set()
+        self._pod_watch_used = {}
+        self._pod_watch_lock = threading.RLock()
+
+        # Statuses read for pods the watch hasn't reported, and the reads in
+        # progress, so concurrent lookups of one pod share a single API call
+        self._status_cache = TTLCache(maxsize=4096, ttl=STATUS_CACHE_TTL)
+        self._status_reads = {}
+        self._status_lock = threading.Lock()
+
+        # Open shell sessions per (namespace, pod name), reused by exec_command
+        self._shell_sessions = {}
+        self._shell_sessions_lock = threading.Lock()
+
     def create_namespace(self, namespace_name: str) -> None:
         """
         Create a Kubernetes namespace if it doesn't exist.
@@ -36,6 +339,9 @@ class KubernetesClient:
         Args:
             namespace_name: Name of the namespace to create
         """
+        if namespace_name in self._known_namespaces:
+            return
+
         try:
             # Check if namespace exists
             self.core_api.read_namespace(name=namespace_name)
@@ -43,20 +349,24 @@ class KubernetesClient:
         except ApiException as e:
             if e.status == 404:
                 # Create namespace
-                namespace = client.V1Namespace(
-                    metadata=client.V1ObjectMeta(
-                        name=namespace_name,
-                        labels={
+                namespace = {
+                    'apiVersion': "v1",
+                    'kind': "Namespace",
+                    'metadata': {
+                        'name': namespace_name,
+                        'labels': {
                             "app": "server-panel",
                             "managed-by": "server-panel"
                         }
-                    )
-                )
+                    }
+                }
                 self.core_api.create_namespace(body=namespace)
                 logger.info(f"Created namespace: {namespace_name}")
             else:
                 raise
 
+        self._known_namespaces[namespace_name] = True
+
     def create_minecraft_server(self, server_name: str, server_config: dict, namespace: str = None) -> dict:
         """
         Create a Minecraft server in Kubernetes.
@@ -75,121 +385,106 @@ class KubernetesClient:
         if namespace is None:
             namespace = self.default_namespace
 
+        names = ServerNames.for_server(server_name)
+
         try:
             # Ensure namespace exists
             self.create_namespace(namespace)
 
-            # Create StatefulSet (includes PVC via volumeClaimTemplates)
-            statefulset = self._create_statefulset(server_name, server_config, namespace)
-
-            # Create Service
-            service = self._create_service(server_name, namespace)
+            # StatefulSet (includes PVC via volumeClaimTemplates) and Service are
+            # independent, so create them concurrently and wait for both
+            statefulset_future = _api_executor.submit(
+                self._create_statefulset, names, server_config, namespace
+            )
+            service_future = _api_executor.submit(self._create_service, names, namespace)
+            futures.wait([statefulset_future, service_future])
+            statefulset_error = statefulset_future.exception()
+            service_error = service_future.exception()
+            if statefulset_error is not None or service_error is not None:
+                # Remove whichever half was created, so the failed server
+                # doesn't leave objects behind that block the name's reuse
+                if statefulset_error is None:
+                    self._clean_up_statefulset(names, namespace)
+                elif service_error is None:
+                    self._clean_up_service(names, namespace)
+                raise statefulset_error or service_error
 
             logger.info(f"Created Minecraft server: {server_name} in namespace {namespace}")
 
             return {
-                'pvc_name': f"{server_name}-data-{server_name}-0",
-                'pod_name': f"{server_name}-0",
-                'service_name': service.metadata.name,
+                'pvc_name': names.pvc_name,
+                'pod_name': names.pod_name,
+                'service_name': names.service_name,
                 'namespace': namespace
             }
 
         except ApiException as e:
             logger.error(f"Failed to create server {server_name}: {e}")
+            # The namespace may have been deleted behind our back; re-check next time
+            self._known_namespaces.pop(namespace, None)
             raise
 
-    def _create_statefulset(self, name: str, config: dict, namespace: str):
-        """Create StatefulSet for Minecraft server."""
-        # Container definition
-        container = client.V1Container(
-            name="minecraft",
-            image=self._get_server_image(config['server_type']),
-            ports=[client.V1ContainerPort(container_port=25565, name="minecraft")],
-            env=[
-                client.V1EnvVar(name="EULA", value="TRUE"),
-                client.V1EnvVar(name="TYPE", value=config['server_type'].upper()),
-                client.V1EnvVar(name="VERSION", value=config['server_version']),
-                client.V1EnvVar(name="MEMORY", value=f"{config['ram_mb']}M"),
-                client.V1EnvVar(name="JVM_OPTS", value=f"-Xms{config['ram_mb']}M -Xmx{config['ram_mb']}M"),
-            ],
-            resources=client.V1ResourceRequirements(
-                requests={
-                    'cpu': f"{config['cpu_cores']}",
-                    'memory': f"{config['ram_mb']}Mi"
-                },
-                limits={
-                    'cpu': f"{config['cpu_cores']}",
-                    'memory': f"{config['ram_mb']}Mi"
-                }
-            ),
-            volume_mounts=[
-                client.V1VolumeMount(
-                    name="data",
-                    mount_path="/data"
-                )
-            ]
-        )
-
-        # Pod template
-        template = client.V1PodTemplateSpec(
-            metadata=client.V1ObjectMeta(
-                labels={
-                    "app": "minecraft",
-                    "server": name
-                }
-            ),
-            spec=client.V1PodSpec(
-                containers=[container]
-            )
-        )
+    def _clean_up_statefulset(self, names: ServerNames, namespace: str) -> None:
+        """Delete a half-created server's StatefulSet and PVC, logging failures."""
+        for resource, delete, name in (
+            ('StatefulSet', self.apps_api.delete_namespaced_stateful_set, names.server_name),
+            # The controller may already have created the PVC from its template
+            ('PVC', self.core_api.delete_namespaced_persistent_volume_claim, names.pvc_name),
+        ):
+            try:
+                delete(name=name, namespace=namespace)
+            except ApiException as e:
+                if e.status != 404:
+                    logger.error(f"Error cleaning up {resource} {name}: {e}")
 
-        # VolumeClaimTemplate
-        volume_claim_template = client.V1PersistentVolumeClaim(
-            metadata=client.V1ObjectMeta(name="data"),
-            spec=client.V1PersistentVolumeClaimSpec(
-                access_modes=["ReadWriteOnce"],
-                resources=client.V1ResourceRequirements(
-                    requests={'storage': f"{config['disk_gb']}Gi"}
-                )
-            )
-        )
+    def _clean_up_service(self, names: ServerNames, namespace: str) -> None:
+        """Delete a half-created server's Service, logging failures."""
+        try:
+            self.core_api.delete_namespaced_service(name=names.service_name, namespace=namespace)
+        except ApiException as e:
+            if e.status != 404:
+                logger.error(f"Error cleaning up Service {names.service_name}: {e}")
 
-        # StatefulSet
-        statefulset = client.V1StatefulSet(
-            metadata=client.V1ObjectMeta(name=name),
-            spec=client.V1StatefulSetSpec(
-                service_name=name,
-                replicas=1,
-                selector=client.V1LabelSelector(
-                    match_labels={"app": "minecraft", "server": name}
-                ),
-                template=template,
-                volume_claim_templates=[volume_claim_template]
-            )
-        )
+    def _create_statefulset(self, names: ServerNames, config: dict, namespace: str):
+        """Create StatefulSet for Minecraft server."""
+        # Copy the cached template so the per-server fields don't leak into it
+        statefulset = copy.deepcopy(_build_statefulset_manifest(
+            self._get_server_image(config['server_type']),
+            config['server_type'],
+            config['server_version'],
+            config['cpu_cores'],
+            config['ram_mb'],
+            config['disk_gb'],
+        ))
+        statefulset['metadata'] = {'name': names.server_name}
+        statefulset['spec']['serviceName'] = names.service_name
+        statefulset['spec']['selector'] = {'matchLabels': dict(names.labels)}
+        statefulset['spec']['template']['metadata'] = {'labels': dict(names.labels)}
 
         return self.apps_api.create_namespaced_stateful_set(
             namespace=namespace,
             body=statefulset
         )
 
-    def _create_service(self, name: str, namespace: str):
+    def _create_service(self, names: ServerNames, namespace: str):
         """Create Service for Minecraft server."""
-        service = client.V1Service(
-            metadata=client.V1ObjectMeta(name=name),
-            spec=client.V1ServiceSpec(
-                selector={"app": "minecraft", "server": name},
-                ports=[
-                    client.V1ServicePort(
-                        name="minecraft",
-                        port=25565,
-                        target_port=25565,
-                        protocol="TCP"
-                    )
+        service = {
+            'apiVersion': "v1",
+            'kind': "Service",
+            'metadata': {'name': names.service_name},
+            'spec': {
+                'selector': dict(names.labels),
+                'ports': [
+                    {
+                        'name': "minecraft",
+                        'port': 25565,
+                        'targetPort': 25565,
+                        'protocol': "TCP"
+                    }
                 ],
-                type="ClusterIP"
-            )
-        )
+                'type': "ClusterIP"
+            }
+        }
 
         return self.core_api.create_namespaced_service(
             namespace=namespace,
@@ -198,58 +493,142 @@ class KubernetesClient:
 
     def _get_server_image(self, server_type: str) -> str:
         """Get Docker image for server type."""
-        images = {
-            'vanilla': 'itzg/minecraft-server:latest',
-            'paper': 'itzg/minecraft-server:latest',
-            'spigot': 'itzg/minecraft-server:latest',
-            'forge': 'itzg/minecraft-server:latest',
-            'fabric': 'itzg/minecraft-server:latest'
-        }
-        return images.get(server_type, 'itzg/minecraft-server:latest')
+        return _IMAGES.get(server_type, _DEFAULT_IMAGE)
 
     def delete_server(self, server_name: str, namespace: str = None) -> None:
         """
         Delete all Kubernetes resources for a server.
 
+        The StatefulSet, Service and PVC deletes are independent, so they run
+        concurrently; every delete is attempted even if another one fails.
+
         Args:
             server_name: Kubernetes server name
             namespace: Kubernetes namespace (defaults to default_namespace)
+
+        Raises:
+            ApiException: The first failure, once all deletes have finished
         """
         if namespace is None:
             namespace = self.default_namespace
 
-        try:
-            # Delete StatefulSet
-            self.apps_api.delete_namespaced_stateful_set(
-                name=server_name,
-                namespace=namespace,
-                body=client.V1DeleteOptions()
-            )
-            logger.info(f"Deleted StatefulSet: {server_name}")
+        self._forget_server_status(server_name, namespace)
 
-            # Delete Service
-            self.core_api.delete_namespaced_service(
-                name=server_name,
+        names = ServerNames.for_server(server_name)
+        deletes = {
+            f"StatefulSet: {names.server_name}": _api_executor.submit(
+                self.apps_api.delete_namespaced_stateful_set,
+                name=names.server_name,
+                namespace=namespace,
+                body={}
+            ),
+            f"Service: {names.service_name}": _api_executor.submit(
+                self.core_api.delete_namespaced_service,
+                name=names.service_name,
                 namespace=namespace
-            )
-            logger.info(f"Deleted Service: {server_name}")
-
-            # Delete PVC
-            pvc_name = f"{server_name}-data-{server_name}-0"
-            self.core_api.delete_namespaced_persistent_volume_claim(
-                name=pvc_name,
+            ),
+            f"PVC: {names.pvc_name}": _api_executor.submit(
+                self.core_api.delete_namespaced_persistent_volume_claim,
+                name=names.pvc_name,
                 namespace=namespace
-            )
-            logger.info(f"Deleted PVC: {pvc_name}")
+            ),
+        }
+        futures.wait(deletes.values())
 
-        except ApiException as e:
-            logger.error(f"Error deleting server {server_name}: {e}")
-            raise
+        errors = []
+        for resource, future in deletes.items():
+            error = future.exception()
+            if error is None:
+                logger.info(f"Deleted {resource}")
+            else:
+                logger.error(f"Error deleting server {server_name} ({resource}): {error}")
+                errors.append(error)
+
+        if errors:
+            raise errors[0]
+
+    def _ensure_pod_watch(self, namespace: str) -> dict:
+        """
+        Start watching a namespace's server pods unless already watched.
+
+        Args:
+            namespace: Kubernetes namespace
+
+        Returns:
+            The namespace's pod name to phase dict, updated in the background
+        """
+        self._pod_watch_used[namespace] = time.monotonic()
+        phases = self._pod_phases.get(namespace)
+        if phases is not None:
+            return phases
+
+        with self._pod_watch_lock:
+            phases = self._pod_phases.get(namespace)
+            if phases is None:
+                phases = self._pod_phases[namespace] = {}
+                threading.Thread(
+                    target=self._watch_pods,
+                    args=(namespace, phases),
+                    name=f"k8s-pod-watch-{namespace}",
+                    daemon=True
+                ).start()
+        return phases
+
+    def _watch_pods(self, namespace: str, phases: dict) -> None:
+        """Keep phases in sync with the namespace's server pods until it goes unused."""
+        while not self._stop_idle_pod_watch(namespace, phases):
+            try:
+                # Relist, then follow changes until the watch times out and
+                # the next relist replaces everything
+                listing = self.list_server_statuses(namespace)
+                with self._pod_watch_lock:
+                    phases.clear()
+                    phases.update(listing)
+                    self._pod_watch_synced.add(namespace)
+
+                for event in watch.Watch().stream(
+                    self.core_api.list_namespaced_pod,
+                    namespace=namespace,
+                    label_selector="app=minecraft",
+                    timeout_seconds=POD_RELIST_INTERVAL
+                ):
+                    pod = event['object']
+                    with self._pod_watch_lock:
+                        if event['type'] == 'DELETED':
+                            phases.pop(pod.metadata.name, None)
+                        else:
+                            phases[pod.metadata.name] = pod.status.phase
+            except Exception as e:
+                logger.warning(f"Pod watch for namespace {namespace} failed: {e}")
+                with self._pod_watch_lock:
+                    self._pod_watch_synced.discard(namespace)
+                time.sleep(POD_WATCH_RETRY_DELAY)
+
+    def _stop_idle_pod_watch(self, namespace: str, phases: dict) -> bool:
+        """
+        Forget a namespace's watched pods if no status was looked up recently.
+
+        Returns:
+            True if the watch should stop
+        """
+        with self._pod_watch_lock:
+            last_used = self._pod_watch_used.get(namespace)
+            if last_used is not None and time.monotonic() - last_used < POD_WATCH_IDLE:
+                return False
+            if self._pod_phases.get(namespace) is phases:
+                del self._pod_phases[namespace]
+                self._pod_watch_synced.discard(namespace)
+                self._pod_watch_used.pop(namespace, None)
+        logger.info(f"Stopped idle pod watch for namespace {namespace}")
+        return True
 
     def get_server_status(self, pod_name: str, namespace: str = None) -> str:
         """
         Get the status of a server pod.
 
+        Served from the namespace's pod watch; the API is only queried while
+        the watch hasn't loaded the namespace yet or is reconnecting.
+
         Args:
             pod_name: Name of the pod
             namespace: Kubernetes namespace (defaults to default_namespace)
@@ -260,16 +639,168 @@ class KubernetesClient:
         if namespace is None:
             namespace = self.default_namespace
 
+        phases = self._ensure_pod_watch(namespace)
+        with self._pod_watch_lock:
+            phase = phases.get(pod_name)
+            synced = namespace in self._pod_watch_synced
+        if phase is not None:
+            return phase
+        if synced:
+            # The watch knows every pod; this one doesn't exist
+            return 'Unknown'
+
         try:
-            pod = self.core_api.read_namespaced_pod(
-                name=pod_name,
-                namespace=namespace
-            )
-            return pod.status.phase
+            return self._read_pod_phase(pod_name, namespace)
         except ApiException as e:
             logger.error(f"Error getting pod status for {pod_name}: {e}")
             return 'Unknown'
 
+    def _read_pod_phase(self, pod_name: str, namespace: str) -> str:
+        """
+        Read a pod's phase from the API, reusing recent and in-flight reads.
+
+        Raises:
+            ApiException: If Kubernetes API call fails
+        """
+        key = (namespace, pod_name)
+        with self._status_lock:
+            phase = self._status_cache.get(key)
+            if phase is not None:
+                return phase
+            read = self._status_reads.get(key)
+            if read is None:
+                read = self._status_reads[key] = futures.Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return read.result()
+
+        try:
+            try:
+                # Only the phase is needed, so skip building the V1Pod model
+                response = self.core_api.read_namespaced_pod_status(
+                    name=pod_name,
+                    namespace=namespace,
+                    _preload_content=False
+                )
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+                # No pod (deleted, or scaled to zero) is an answer, not an error
+                pod = {}
+            else:
+                try:
+                    pod = orjson.loads(response.data)
+                finally:
+                    response.release_conn()
+        except BaseException as e:
+            with self._status_lock:
+                del self._status_reads[key]
+            read.set_exception(e)
+            raise
+
+        phase = pod.get('status', {}).get('phase', 'Unknown')
+        with self._status_lock:
+            self._status_cache[key] = phase
+            del self._status_reads[key]
+        read.set_result(phase)
+        return phase
+
+    def _forget_server_status(self, server_name: str, namespace: str) -> None:
+        """Drop the cached status of a server's pod after changing its state."""
+        with self._status_lock:
+            self._status_cache.pop((namespace, ServerNames.for_server(server_name).pod_name), None)
+
+    def list_server_statuses(self, namespace: str = None) -> dict:
+        """
+        Get the status of every server pod in a namespace with one listing.
+
+        The listing is parsed as raw JSON, reading only names and phases
+        rather than building a V1Pod model for every pod.
+
+        Args:
+            namespace: Kubernetes namespace (defaults to default_namespace)
+
+        Returns:
+            Dict mapping pod name to status string (Running, Pending, ...)
+
+        Raises:
+            ApiException: If Kubernetes API call fails
+        """
+        if namespace is None:
+            namespace = self.default_namespace
+
+        statuses = {}
+        continue_token = None
+        while True:
+            kwargs = {'_continue': continue_token} if continue_token else {}
+            response = self.core_api.list_namespaced_pod(
+                namespace=namespace,
+                label_selector="app=minecraft",
+                limit=POD_LIST_PAGE_SIZE,
+                _preload_content=False,
+                **kwargs
+            )
+            try:
+                pods = orjson.loads(response.data)
+            finally:
+                response.release_conn()
+
+            for pod in pods['items']:
+                statuses[pod['metadata']['name']] = pod.get('status', {}).get('phase', 'Unknown')
+
+            continue_token = pods['metadata'].get('continue')
+            if not continue_token:
+                return statuses
+
+    def get_statuses_for(self, namespace: str, pod_names: list) -> dict:
+        """
+        Get the statuses of several server pods in a namespace at once.
+
+        Served from the namespace's pod watch once it has loaded, otherwise
+        from a single listing.
+
+        Args:
+            namespace: Kubernetes namespace
+            pod_names: Names of the pods of interest
+
+        Returns:
+            Dict mapping each pod name that exists to its lowercased status
+
+        Raises:
+            ApiException: If Kubernetes API call fails
+        """
+        phases = self._ensure_pod_watch(namespace)
+        with self._pod_watch_lock:
+            if namespace in self._pod_watch_synced:
+                statuses = dict(phases)
+            else:
+                statuses = None
+        if statuses is None:
+            statuses = self.list_server_statuses(namespace)
+        return {name: statuses[name].lower() for name in pod_names if name in statuses}
+
+    def _set_replicas(self, server_name: str, namespace: str, replicas: int) -> None:
+        """
+        Scale a server's StatefulSet.
+
+        Always patches: another worker may have scaled the server since this
+        process last did, so what it sent before says nothing about now.
+
+        Args:
+            server_name: Kubernetes server name
+            namespace: Kubernetes namespace
+            replicas: Desired replica count
+        """
+        self.apps_api.patch_namespaced_stateful_set(
+            name=server_name,
+            namespace=namespace,
+            body={'spec': {'replicas': replicas}}
+        )
+        self._forget_server_status(server_name, namespace)
+
     def start_server(self, server_name: str, namespace: str = None) -> None:
         """
         Start a stopped server by scaling StatefulSet to 1.
@@ -282,13 +813,7 @@ class KubernetesClient:
             namespace = self.default_namespace
 
         try:
-            # Patch StatefulSet to set replicas=1
-            body = {'spec': {'replicas': 1}}
-            self.apps_api.patch_namespaced_stateful_set(
-                name=server_name,
-                namespace=namespace,
-                body=body
-            )
+            self._set_replicas(server_name, namespace, 1)
             logger.info(f"Started server: {server_name}")
 
         except ApiException as e:
@@ -307,49 +832,180 @@ class KubernetesClient:
             namespace = self.default_namespace
 
         try:
-            # Patch StatefulSet to set replicas=0
-            body = {'spec': {'replicas': 0}}
+            self._set_replicas(server_name, namespace, 0)
+            logger.info(f"Stopped server: {server_name}")
+
+        except ApiException as e:
+            logger.error(f"Error stopping server {server_name}: {e}")
+            raise
+
+    def restart_server(self, server_name: str, namespace: str = None) -> None:
+        """
+        Restart a server with a single patch, like `kubectl rollout restart`.
+
+        Scales the StatefulSet to 1 and stamps its pod template with the
+        restart time, so the controller replaces a running pod (or starts a
+        stopped one).
+
+        Args:
+            server_name: Kubernetes server name
+            namespace: Kubernetes namespace (defaults to default_namespace)
+        """
+        if namespace is None:
+            namespace = self.default_namespace
+
+        body = {
+            'spec': {
+                'replicas': 1,
+                'template': {
+                    'metadata': {
+                        'annotations': {
+                            'kubectl.kubernetes.io/restartedAt': datetime.now(timezone.utc).isoformat()
+                        }
+                    }
+                }
+            }
+        }
+
+        try:
             self.apps_api.patch_namespaced_stateful_set(
                 name=server_name,
                 namespace=namespace,
                 body=body
             )
-            logger.info(f"Stopped server: {server_name}")
+            logger.info(f"Restarted server: {server_name}")
 
         except ApiException as e:
-            logger.error(f"Error stopping server {server_name}: {e}")
+            logger.error(f"Error restarting server {server_name}: {e}")
             raise
 
-    def get_server_logs(self, pod_name: str, namespace: str = None, tail_lines: int = 100) -> str:
+        finally:
+            self._forget_server_status(server_name, namespace)
+
+    def stream_server_logs(self, pod_name: str, namespace: str = None, tail_lines: int = 100,
+                           limit_bytes: int = LOG_LIMIT_BYTES):
         """
-        Get logs from a server pod.
+        Stream logs from a server pod without buffering the whole response.
 
         Args:
             pod_name: Name of the pod
             namespace: Kubernetes namespace (defaults to default_namespace)
             tail_lines: Number of lines to retrieve
+            limit_bytes: Cap on the bytes the API server returns, counted from the
+                start of the tail, so very long lines can push out the newest ones
+                (None for no cap)
 
-        Returns:
-            Log output as string
+        Yields:
+            Decoded chunks of log output
+
+        Raises:
+            ApiException: If Kubernetes API call fails
         """
         if namespace is None:
             namespace = self.default_namespace
 
+        kwargs = {'tail_lines': tail_lines}
+        if limit_bytes is not None:
+            kwargs['limit_bytes'] = limit_bytes
+
+        response = self.core_api.read_namespaced_pod_log(
+            name=pod_name,
+            namespace=namespace,
+            follow=False,
+            _preload_content=False,
+            **kwargs
+        )
+        # Chunk boundaries can split multi-byte characters
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         try:
-            logs = self.core_api.read_namespaced_pod_log(
-                name=pod_name,
-                namespace=namespace,
-                tail_lines=tail_lines
-            )
-            return logs
+            for chunk in response.stream(4096):
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+        finally:
+            response.release_conn()
+
+    def get_server_logs(self, pod_name: str, namespace: str = None, tail_lines: int = 100,
+                        limit_bytes: int = LOG_LIMIT_BYTES) -> str:
+        """
+        Get logs from a server pod.
+
+        Args:
+            pod_name: Name of the pod
+            namespace: Kubernetes namespace (defaults to default_namespace)
+            tail_lines: Number of lines to retrieve
+            limit_bytes: Cap on the bytes the API server returns, counted from the
+                start of the tail, so very long lines can push out the newest ones
+                (None for no cap)
+
+        Returns:
+            Log output as string
+        """
+        try:
+            return ''.join(self.stream_server_logs(pod_name, namespace, tail_lines, limit_bytes))
         except ApiException as e:
             logger.error(f"Error fetching logs for {pod_name}: {e}")
             return f"Error fetching logs: {str(e)}"
 
+    def _acquire_shell_session(self, pod_name: str, namespace: str):
+        """
+        Get the pod's shell session, opened and locked for the caller.
+
+        Args:
+            pod_name: Name of the pod
+            namespace: Kubernetes namespace
+
+        Returns:
+            The session, or None if it's busy or couldn't be opened
+        """
+        key = (namespace, pod_name)
+        now = time.monotonic()
+
+        with self._shell_sessions_lock:
+            # Close sessions nobody has used for a while
+            for other_key, other in list(self._shell_sessions.items()):
+                if now - other.last_used > SHELL_SESSION_IDLE and other.lock.acquire(blocking=False):
+                    del self._shell_sessions[other_key]
+                    other.close()
+                    other.lock.release()
+
+            session = self._shell_sessions.get(key)
+            if session is None:
+                session = self._shell_sessions[key] = _ShellSession()
+            if not session.lock.acquire(blocking=False):
+                return None
+
+        if session.ws is None:
+            try:
+                session.ws = stream(
+                    self.stream_api.connect_get_namespaced_pod_exec,
+                    pod_name,
+                    namespace,
+                    command=['sh'],
+                    stderr=True,
+                    stdin=True,
+                    stdout=True,
+                    tty=False,
+                    _preload_content=False
+                )
+            except ApiException as e:
+                logger.warning(f"Could not open shell session in {pod_name}: {e}")
+                session.lock.release()
+                return None
+
+        return session
+
     def exec_command(self, pod_name: str, command: list, namespace: str = None) -> str:
         """
         Execute a command in a pod.
 
+        Commands run in a shell session kept open per pod, so repeated calls
+        skip the exec handshake. If the session is busy or fails, the command
+        runs in a one-off exec instead, so it should be safe to run twice.
+
         Args:
             pod_name: Name of the pod
             command: Command to execute as list
@@ -361,9 +1017,19 @@ class KubernetesClient:
         if namespace is None:
             namespace = self.default_namespace
 
+        session = self._acquire_shell_session(pod_name, namespace)
+        if session is not None:
+            try:
+                return session.run(command, SHELL_COMMAND_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Shell session in {pod_name} failed, using a one-off exec: {e}")
+                session.close()
+            finally:
+                session.lock.release()
+
         try:
             resp = stream(
-                self.core_api.connect_get_namespaced_pod_exec,
+                self.stream_api.connect_get_namespaced_pod_exec,
                 pod_name,
                 namespace,
                 command=command,
@@ -377,6 +1043,44 @@ class KubernetesClient:
             logger.error(f"Error executing command in {pod_name}: {e}")
             return f"Error: {str(e)}"
 
+    def _exec_with_stdin(self, pod_name: str, command: list, data, namespace: str = None) -> str:
+        """
+        Execute a command in a pod, feeding it data on stdin.
+
+        Args:
+            pod_name: Name of the pod
+            command: Command to execute as list; it must exit once it has read all of data
+            data: Text or bytes written to the command's stdin
+            namespace: Kubernetes namespace (defaults to default_namespace)
+
+        Returns:
+            Command output as string
+        """
+        if namespace is None:
+            namespace = self.default_namespace
+
+        try:
+            resp = stream(
+                self.stream_api.connect_get_namespaced_pod_exec,
+                pod_name,
+                namespace,
+                command=command,
+                stderr=True,
+                stdin=True,
+                stdout=True,
+                tty=False,
+                _preload_content=False
+            )
+            try:
+                resp.write_stdin(data)
+                resp.run_forever(timeout=EXEC_STDIN_TIMEOUT)
+                return resp.read_all()
+            finally:
+                resp.close()
+        except ApiException as e:
+            logger.error(f"Error executing command in {pod_name}: {e}")
+            return f"Error: {str(e)}"
+
     def list_files(self, pod_name: str, path: str = '/data', namespace: str = None) -> str:
         """
         List files in a directory in the pod.
@@ -387,9 +1091,10 @@ class KubernetesClient:
             namespace: Kubernetes namespace (defaults to default_namespace)
 
         Returns:
-            ls command output
+            NUL-terminated records of tab-separated type, size, mtime, permissions and name
         """
-        command = ['ls', '-la', '--time-style=+%Y-%m-%d %H:%M:%S', path]
+        command = ['find', path, '-mindepth', '1', '-maxdepth', '1',
+                   '-printf', LIST_FILES_FORMAT]
         return self.exec_command(pod_name, command, namespace)
 
     def read_file(self, pod_name: str, filepath: str, namespace: str = None) -> str:
@@ -420,7 +1125,29 @@ class KubernetesClient:
         Returns:
             Command output
         """
-        # Escape content for shell
-        safe_content = content.replace("'", "'\\''")
-        command = ['sh', '-c', f"cat > {filepath} << 'EOF'\n{safe_content}\nEOF"]
-        return self.exec_command(pod_name, command, namespace)
+        data = content.encode('utf-8')
+        # Content goes over stdin as-is; the path is a positional argument, so
+        # neither is ever parsed by the shell
+        command = ['sh', '-c', 'head -c "$0" > "$1"', str(len(data)), filepath]
+        return self._exec_with_stdin(pod_name, command, data, namespace)
+
+
+def get_k8s() -> KubernetesClient:
+    """
+    Get the current application's KubernetesClient, creating it on first use.
+
+    Loading the kubernetes package and cluster configuration is deferred until
+    a request actually needs the cluster, so CLI commands, migrations and test
+    collection never pay for it.
+    """
+    k8s_client = current_app.extensions.get('k8s')
+    if k8s_client is None:
+        with _api_client_lock:
+            k8s_client = current_app.extensions.get('k8s')
+            if k8s_client is None:
+                k8s_client = current_app.extensions['k8s'] = KubernetesClient()
+    return k8s_client
+
+
+# Client shared by the current application
+k8s = LocalProxy(get_k8s)
@@ -1,37 +1,146 @@
 """
 Server management routes for CRUD operations on game servers.
 """
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from concurrent import futures
+from datetime import datetime, timedelta
+from flask import current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app.servers import servers
 from app.models import db, Server
-from app.servers.kubernetes_client import KubernetesClient
+from app.servers.kubernetes_client import k8s
 from app.config import Config
+from sqlalchemy import select, update
+from sqlalchemy.orm import load_only
 import logging
 
 logger = logging.getLogger(__name__)
-k8s = KubernetesClient()
 
+# Removes deleted servers' Kubernetes resources and rows after the response
+_delete_executor = futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='server-delete')
 
-@servers.route('/dashboard')
-@login_required
-def dashboard():
-    """Display user's server dashboard."""
-    # Get user's servers
-    user_servers = current_user.servers.all()
+# A server still 'deleting' this long after its delete was queued lost the
+# background task (e.g. its worker was restarted), so the delete is queued again
+_DELETE_RETRY_AFTER = timedelta(minutes=10)
+
+# Resource plans, bound once; Config.RESOURCE_PLANS is already read-only
+_PLANS = Config.RESOURCE_PLANS
+_PLAN_ITEMS = tuple(_PLANS.items())
+
+
+# Columns shown on the dashboard (template and JSON payload); the rest stay unloaded
+_DASHBOARD_COLUMNS = (
+    Server.id, Server.name, Server.owner_id, Server.server_type, Server.server_version,
+    Server.status, Server.cpu_cores, Server.ram_mb, Server.disk_gb, Server.created_at,
+    Server.namespace, Server.pod_name,
+)
+
+
+def _dashboard_servers() -> list:
+    """Load the current user's servers with just the dashboard columns, in one query."""
+    return db.session.scalars(
+        select(Server)
+        .options(load_only(*_DASHBOARD_COLUMNS))
+        .where(Server.owner_id == current_user.id)
+        .order_by(Server.id)
+    ).all()
 
-    # Update status from Kubernetes
+
+# Columns the start/stop/restart/delete routes read
+_CONTROL_COLUMNS = (
+    Server.id, Server.name, Server.owner_id, Server.status, Server.namespace, Server.k8s_name,
+)
+
+
+def _control_server_or_404(server_id: int) -> Server:
+    """Load just the columns needed to control a server, or abort with 404."""
+    return db.one_or_404(
+        select(Server)
+        .options(load_only(*_CONTROL_COLUMNS))
+        .where(Server.id == server_id)
+    )
+
+
+def _status_updates(user_servers) -> list:
+    """
+    Get the servers' statuses from Kubernetes, listing each namespace's pods once.
+
+    Returns:
+        {'id', 'status'} mappings for the servers whose status changed
+    """
+    by_namespace = {}
     for server in user_servers:
-        if server.pod_name and server.namespace:
-            try:
-                status = k8s.get_server_status(server.pod_name, server.namespace).lower()
-                server.status = status
-            except Exception as e:
-                logger.error(f"Error updating status for server {server.id}: {e}")
-                server.status = 'error'
+        # A deleting server's pod still shows up until the background delete finishes
+        if server.pod_name and server.namespace and server.status != 'deleting':
+            by_namespace.setdefault(server.namespace, []).append(server)
 
+    updates = []
+    for namespace, namespace_servers in by_namespace.items():
+        try:
+            statuses = k8s.get_statuses_for(namespace, [s.pod_name for s in namespace_servers])
+        except Exception as e:
+            logger.error(f"Error listing server statuses in namespace {namespace}: {e}")
+            statuses = None
+
+        for server in namespace_servers:
+            status = 'error' if statuses is None else statuses.get(server.pod_name, 'unknown')
+            if status != server.status:
+                updates.append({'id': server.id, 'status': status})
+
+    return updates
+
+
+def _retry_stale_deletes(user_servers) -> None:
+    """
+    Queue the delete again for servers stuck in 'deleting'.
+
+    Claiming a server bumps its updated_at in the same UPDATE, so only one
+    worker re-queues it, and not again until _DELETE_RETRY_AFTER has passed.
+    """
+    deleting = [server.id for server in user_servers if server.status == 'deleting']
+    if not deleting:
+        return
+
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(Server)
+        .where(Server.id.in_(deleting), Server.status == 'deleting',
+               Server.updated_at < now - _DELETE_RETRY_AFTER)
+        .values(updated_at=now)
+        .returning(Server.id, Server.k8s_name, Server.namespace)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not claimed:
+        return
     db.session.commit()
 
+    app = current_app._get_current_object()
+    for server_id, server_name, namespace in claimed:
+        logger.warning(f"Retrying delete of server {server_id}")
+        _delete_executor.submit(_delete_server_resources, app, server_id, server_name, namespace)
+
+
+def _refresh_dashboard_servers() -> list:
+    """Load the user's servers, store any status changes from Kubernetes and retry lost deletes."""
+    user_servers = _dashboard_servers()
+    _retry_stale_deletes(user_servers)
+    updates = _status_updates(user_servers)
+    if updates:
+        # One executemany UPDATE keyed on id, rather than a flush per server
+        db.session.execute(update(Server), updates)
+        db.session.commit()
+        # Reload every server together with its new status, rather than one
+        # lazy refresh per expired instance
+        user_servers = _dashboard_servers()
+    return user_servers
+
+
+@servers.route('/dashboard')
+@login_required
+def dashboard():
+    """Display user's server dashboard."""
+    # Get user's servers, with status updated from Kubernetes
+    user_servers = _refresh_dashboard_servers()
+
     # Get resource usage
     usage = current_user.get_resource_usage()
 
@@ -40,6 +149,31 @@ def dashboard():
                           usage=usage)
 
 
+@servers.route('/api/dashboard')
+@login_required
+def dashboard_data():
+    """Servers, statuses and resource usage in one payload (AJAX endpoint)."""
+    data = {'servers': [], 'statuses': {}, 'usage': None, 'errors': {}}
+
+    # Each part is filled in independently so one failure doesn't empty the rest
+    try:
+        user_servers = _refresh_dashboard_servers()
+        data['servers'] = [server.to_dict() for server in user_servers]
+        data['statuses'] = {str(server.id): server.status for server in user_servers}
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard servers: {e}")
+        db.session.rollback()
+        data['errors']['servers'] = str(e)
+
+    try:
+        data['usage'] = current_user.get_resource_usage()
+    except Exception as e:
+        logger.error(f"Error computing resource usage: {e}")
+        data['errors']['usage'] = str(e)
+
+    return jsonify(data)
+
+
 @servers.route('/create', methods=['GET', 'POST'])
 @login_required
 def create():
@@ -58,13 +192,11 @@ def create():
                 return redirect(url_for('servers.create'))
 
             # Get resource plan
-            plans = Config.RESOURCE_PLANS
-            if plan not in plans:
+            resources = _PLANS.get(plan)
+            if resources is None:
                 flash('Invalid resource plan.', 'error')
                 return redirect(url_for('servers.create'))
 
-            resources = plans[plan]
-
             # Check quota
             can_create, error = current_user.can_create_server(
                 resources['cpu_cores'],
@@ -106,6 +238,7 @@ def create():
                 }, namespace=user_namespace)
 
                 # Update database with K8s info
+                server.k8s_name = k8s_name
                 server.pod_name = k8s_resources['pod_name']
                 server.pvc_name = k8s_resources['pvc_name']
                 server.service_name = k8s_resources['service_name']
@@ -130,14 +263,14 @@ def create():
             return redirect(url_for('servers.create'))
 
     # GET request - show form
-    return render_template('servers/create.html', plans=Config.RESOURCE_PLANS)
+    return render_template('servers/create.html', plans=_PLAN_ITEMS)
 
 
 @servers.route('/<int:server_id>')
 @login_required
 def detail(server_id):
     """View server details."""
-    server = Server.query.get_or_404(server_id)
+    server = db.get_or_404(Server, server_id)
 
     # Check permission
     if server.owner_id != current_user.id and not current_user.is_admin:
@@ -145,11 +278,12 @@ def detail(server_id):
         return redirect(url_for('servers.dashboard'))
 
     # Update status
-    if server.pod_name and server.namespace:
+    if server.pod_name and server.namespace and server.status != 'deleting':
         try:
             status = k8s.get_server_status(server.pod_name, server.namespace).lower()
-            server.status = status
-            db.session.commit()
+            if status != server.status:
+                server.status = status
+                db.session.commit()
         except Exception as e:
             logger.error(f"Error updating server status: {e}")
 
@@ -160,15 +294,14 @@ def detail(server_id):
 @login_required
 def start(server_id):
     """Start a server."""
-    server = Server.query.get_or_404(server_id)
+    server = _control_server_or_404(server_id)
 
     # Check permission
     if server.owner_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
 
     try:
-        # Extract server name from pod_name (remove -0 suffix)
-        server_name = server.pod_name.rsplit('-', 1)[0] if server.pod_name else None
+        server_name = server.k8s_name
         if not server_name or not server.namespace:
             return jsonify({'error': 'Invalid server configuration'}), 400
 
@@ -187,15 +320,14 @@ def start(server_id):
 @login_required
 def stop(server_id):
     """Stop a server."""
-    server = Server.query.get_or_404(server_id)
+    server = _control_server_or_404(server_id)
 
     # Check permission
     if server.owner_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
 
     try:
-        # Extract server name from pod_name
-        server_name = server.pod_name.rsplit('-', 1)[0] if server.pod_name else None
+        server_name = server.k8s_name
         if not server_name or not server.namespace:
             return jsonify({'error': 'Invalid server configuration'}), 400
 
@@ -214,20 +346,18 @@ def stop(server_id):
 @login_required
 def restart(server_id):
     """Restart a server."""
-    server = Server.query.get_or_404(server_id)
+    server = _control_server_or_404(server_id)
 
     # Check permission
     if server.owner_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
 
     try:
-        server_name = server.pod_name.rsplit('-', 1)[0] if server.pod_name else None
+        server_name = server.k8s_name
         if not server_name or not server.namespace:
             return jsonify({'error': 'Invalid server configuration'}), 400
 
-        # Stop then start
-        k8s.stop_server(server_name, server.namespace)
-        k8s.start_server(server_name, server.namespace)
+        k8s.restart_server(server_name, server.namespace)
         server.status = 'starting'
         db.session.commit()
 
@@ -242,31 +372,46 @@ def restart(server_id):
 @login_required
 def delete(server_id):
     """Delete a server."""
-    server = Server.query.get_or_404(server_id)
+    server = _control_server_or_404(server_id)
 
     # Check permission (only owner can delete)
     if server.owner_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
 
     try:
-        server_name = server.pod_name.rsplit('-', 1)[0] if server.pod_name else None
+        # The Kubernetes deletes can take seconds; finish them in the background
+        server.status = 'deleting'
+        db.session.commit()
+
+        _delete_executor.submit(_delete_server_resources, current_app._get_current_object(),
+                                server.id, server.k8s_name, server.namespace)
+
+        flash(f'Server "{server.name}" is being deleted.', 'success')
+        return jsonify({'status': 'success', 'message': 'Server deleting'})
 
+    except Exception as e:
+        logger.error(f"Error deleting server {server_id}: {e}")
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _delete_server_resources(app, server_id: int, server_name: str, namespace: str) -> None:
+    """Delete a server's Kubernetes resources, then its database row (runs on _delete_executor)."""
+    with app.app_context():
         # Delete from Kubernetes
-        if server_name and server.namespace:
+        if server_name and namespace:
             try:
-                k8s.delete_server(server_name, server.namespace)
+                k8s.delete_server(server_name, namespace)
             except Exception as e:
                 logger.error(f"Error deleting Kubernetes resources: {e}")
                 # Continue with database deletion even if K8s deletion fails
 
         # Delete from database
-        db.session.delete(server)
-        db.session.commit()
-
-        flash(f'Server "{server.name}" has been deleted.', 'success')
-        return jsonify({'status': 'success', 'message': 'Server deleted'})
-
-    except Exception as e:
-        logger.error(f"Error deleting server {server_id}: {e}")
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+        try:
+            server = db.session.get(Server, server_id)
+            if server is not None:
+                db.session.delete(server)
+                db.session.commit()
+        except Exception as e:
+            logger.error(f"Error deleting server {server_id}: {e}")
+            db.session.rollback()
@@ -1,3 +1,60 @@
 """
 Utility functions and decorators.
 """
+import decimal
+import json
+
+import orjson
+from flask.json.provider import JSONProvider
+from flask_login import current_user
+from sqlalchemy import select
+from app.models import db, Server
+
+
+def user_server_or_404(server_id: int) -> Server:
+    """
+    Get a server the current user may access, or abort with 404.
+
+    Ownership is filtered in SQL, so servers belonging to other users are
+    indistinguishable from missing ones. Admins can access every server.
+    """
+    stmt = select(Server).where(Server.id == server_id)
+    if not current_user.is_admin:
+        stmt = stmt.where(Server.owner_id == current_user.id)
+    return db.one_or_404(stmt)
+
+
+def _orjson_default(obj):
+    """Serialize the few types orjson doesn't handle natively."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Used for jsonify(), dict return values and request.get_json(). Datetimes
+    are encoded as ISO 8601 strings.
+    """
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_orjson_default).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            # e.g. the session serializer's object_hook, which orjson doesn't support
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_orjson_default),
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for production deployments.
+
+The panel is I/O bound (PostgreSQL and the Kubernetes API), so workers use
+gevent to service many in-flight requests per process. The gevent worker
+monkey-patches the standard library before the application is imported, which
+also covers the urllib3 and websocket-client sockets used by the kubernetes
+client.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gevent'
+# A fixed, small default: cpu_count() reports the node's cores, not the pod's
+# CPU limit, and each worker has its own database pool, pod watches and shell
+# sessions. One gevent worker already serves worker_connections requests.
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = 120
+
+
+def post_fork(server, worker):
+    """Make psycopg2 yield to the gevent hub while waiting on PostgreSQL."""
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
@@ -76,3 +76,34 @@ Database URL
 {{- .Values.config.externalDatabaseUrl }}
 {{- end }}
 {{- end }}
+
+{{/*
+Application environment shared by the web container and the migration init container
+*/}}
+{{- define "server-panel.env" -}}
+- name: DATABASE_URL
+  valueFrom:
+    secretKeyRef:
+      name: {{ include "server-panel.fullname" . }}
+      key: database-url
+- name: SECRET_KEY
+  valueFrom:
+    secretKeyRef:
+      name: {{ include "server-panel.fullname" . }}
+      key: secret-key
+- name: FLASK_ENV
+  valueFrom:
+    configMapKeyRef:
+      name: {{ include "server-panel.fullname" . }}
+      key: flask-env
+- name: K8S_NAMESPACE
+  valueFrom:
+    configMapKeyRef:
+      name: {{ include "server-panel.fullname" . }}
+      key: kubernetes-namespace
+- name: K8S_IN_CLUSTER
+  valueFrom:
+    configMapKeyRef:
+      name: {{ include "server-panel.fullname" . }}
+      key: in-cluster
+{{- end }}
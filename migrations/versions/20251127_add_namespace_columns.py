@@ -20,15 +20,17 @@ def upgrade():
     # Add k8s_namespace column to users table
     op.add_column('users', sa.Column('k8s_namespace', sa.String(length=63), nullable=True))
 
-    # Add namespace column to servers table
-    op.add_column('servers', sa.Column('namespace', sa.String(length=63), nullable=True))
-
-    # Update existing users to generate their namespace
+    # Add namespace column to servers table; the temporary default fills
+    # existing servers with the legacy game-servers namespace as part of the
+    # ALTER TABLE instead of a second pass over the table
+    op.add_column('servers', sa.Column('namespace', sa.String(length=63), nullable=True,
+                                       server_default='game-servers'))
+    op.alter_column('servers', 'namespace', server_default=None)
+
+    # Update existing users to generate their namespace (a column default
+    # can't reference id, so this one still needs an UPDATE)
     op.execute("UPDATE users SET k8s_namespace = 'user-' || id WHERE k8s_namespace IS NULL")
 
-    # Update existing servers to use the legacy game-servers namespace
-    op.execute("UPDATE servers SET namespace = 'game-servers' WHERE namespace IS NULL")
-
 
 def downgrade():
     # Remove namespace column from servers table
@@ -0,0 +1,32 @@
+"""Store each server's StatefulSet name instead of deriving it from pod_name
+
+Revision ID: 003_servers_k8s_name
+Revises: 002_servers_owner_status_idx
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_servers_k8s_name'
+down_revision = '002_servers_owner_status_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('servers', sa.Column('k8s_name', sa.String(length=63), nullable=True))
+    op.create_index('ix_servers_k8s_name', 'servers', ['k8s_name'])
+
+    # The pod of a single-replica StatefulSet is always named <statefulset>-0
+    op.execute(
+        "UPDATE servers SET k8s_name = substr(pod_name, 1, length(pod_name) - 2) "
+        "WHERE k8s_name IS NULL AND pod_name LIKE '%-0'"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_servers_k8s_name', table_name='servers')
+    op.drop_column('servers', 'k8s_name')
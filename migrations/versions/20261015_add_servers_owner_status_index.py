@@ -0,0 +1,30 @@
+"""Add covering index on servers (owner_id, status) for quota queries
+
+Revision ID: 002_servers_owner_status_idx
+Revises: 001_add_namespaces
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002_servers_owner_status_idx'
+down_revision = '001_add_namespaces'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # INCLUDE lets PostgreSQL answer the resource usage aggregate with an index-only scan
+    op.create_index(
+        'ix_servers_owner_status',
+        'servers',
+        ['owner_id', 'status'],
+        postgresql_include=['cpu_cores', 'ram_mb']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_servers_owner_status', table_name='servers')
@@ -0,0 +1,26 @@
+"""Index servers.pod_name
+
+Revision ID: 004_servers_pod_name_idx
+Revises: 003_servers_k8s_name
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_servers_pod_name_idx'
+down_revision = '003_servers_k8s_name'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Not unique: pod names only have to be unique within a namespace.
+    # owner_id needs no index of its own; it leads ix_servers_owner_status.
+    op.create_index('ix_servers_pod_name', 'servers', ['pod_name'])
+
+
+def downgrade():
+    op.drop_index('ix_servers_pod_name', table_name='servers')
@@ -2,6 +2,7 @@
 Pytest configuration and fixtures.
 """
 import pytest
+from sqlalchemy import event
 from app import create_app
 from app.models import db, User, Server
 
@@ -19,16 +20,54 @@ def client(app):
     return app.test_client()
 
 
-@pytest.fixture(scope='function')
-def init_database(app):
-    """Initialize database for testing."""
+def _enable_sqlite_savepoints(engine):
+    """Let pysqlite run SAVEPOINTs inside an explicit outer transaction."""
+
+    @event.listens_for(engine, 'connect')
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _emit_begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+    # The in-memory database lives on a single pooled connection, so drop it
+    # to make sure the listeners above apply to the one the schema goes into.
+    engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def database_schema(app):
+    """Create the database schema once for the whole test session."""
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            _enable_sqlite_savepoints(db.engine)
         db.create_all()
         yield db
         db.session.remove()
         db.drop_all()
 
 
+@pytest.fixture(scope='function')
+def init_database(app, database_schema, monkeypatch):
+    """Run each test inside a transaction that is rolled back afterwards."""
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        # Every session, including those opened by test client requests,
+        # resolves its bind to this connection and joins the outer
+        # transaction; their commits only release savepoints.
+        monkeypatch.setitem(db.engines, None, connection)
+        db.session.configure(join_transaction_mode='create_savepoint')
+        try:
+            yield db
+        finally:
+            db.session.remove()
+            monkeypatch.undo()
+            transaction.rollback()
+            connection.close()
+
+
 @pytest.fixture(scope='function')
 def test_user(init_database):
     """Create a test user."""
@@ -50,3 +89,14 @@ def admin_user(init_database):
     db.session.add(user)
     db.session.commit()
     return user
+
+
+@pytest.fixture(scope='function')
+def login():
+    """Helper that logs a user in through the auth form."""
+    def _login(client, user, password='password123'):
+        return client.post('/auth/login', data={
+            'email': user.email,
+            'password': password
+        })
+    return _login
@@ -0,0 +1,79 @@
+"""
+Unit tests for REST API routes.
+"""
+from datetime import datetime
+from app.models import Server
+
+
+def test_health(client):
+    """Test health endpoint reports service status."""
+    response = client.get('/api/health')
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'healthy', 'service': 'server-panel-api'}
+    assert response.headers['Cache-Control'] == 'public, max-age=5'
+
+
+def test_list_plans(client):
+    """Test resource plans are exposed as cacheable JSON."""
+    response = client.get('/api/plans')
+    assert response.status_code == 200
+    assert response.get_json()['small'] == {'cpu_cores': 1, 'ram_mb': 2048, 'disk_gb': 10}
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+
+
+def test_list_servers(client, test_user, init_database, login):
+    """Test listing servers returns the user's servers as JSON."""
+    server = Server(
+        name='Test Server',
+        owner_id=test_user.id,
+        server_type='paper',
+        server_version='1.20.1',
+        cpu_cores=2,
+        ram_mb=4096,
+        disk_gb=20,
+        status='running',
+        created_at=datetime(2024, 1, 2, 3, 4, 5)
+    )
+    init_database.session.add(server)
+    init_database.session.commit()
+    login(client, test_user)
+
+    response = client.get('/api/servers')
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'servers': [{
+            'id': server.id,
+            'name': 'Test Server',
+            'type': 'paper',
+            'version': '1.20.1',
+            'status': 'running',
+            'resources': {'cpu': 2, 'ram_mb': 4096, 'disk_gb': 20},
+            'created_at': '2024-01-02T03:04:05',
+            'pod_name': None
+        }]
+    }
+
+
+def test_get_server_hides_other_users_servers(client, test_user, admin_user, init_database, login):
+    """Test users get 404 for servers they don't own, while admins see all servers."""
+    server = Server(
+        name='Admin Server',
+        owner_id=admin_user.id,
+        server_type='paper',
+        server_version='1.20.1',
+        cpu_cores=2,
+        ram_mb=4096,
+        disk_gb=20
+    )
+    init_database.session.add(server)
+    init_database.session.commit()
+
+    login(client, test_user)
+    assert client.get(f'/api/servers/{server.id}').status_code == 404
+
+    client.get('/auth/logout')
+    login(client, admin_user, password='admin123')
+    response = client.get(f'/api/servers/{server.id}')
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Admin Server'
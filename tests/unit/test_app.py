@@ -0,0 +1,25 @@
+"""
+Unit tests for the application factory.
+"""
+import os
+from jinja2 import FileSystemBytecodeCache
+from app import _jinja_bytecode_cache
+
+
+def test_bytecode_cache_dir_created_private(tmp_path):
+    """Test a configured cache directory is created readable only by this user."""
+    cache_dir = tmp_path / 'jinja'
+
+    cache = _jinja_bytecode_cache(str(cache_dir))
+
+    assert isinstance(cache, FileSystemBytecodeCache)
+    assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+
+
+def test_bytecode_cache_dir_refused_when_writable_by_others(tmp_path):
+    """Test templates aren't cached in a directory others could plant files in."""
+    cache_dir = tmp_path / 'jinja'
+    cache_dir.mkdir()
+    cache_dir.chmod(0o777)
+
+    assert _jinja_bytecode_cache(str(cache_dir)) is None
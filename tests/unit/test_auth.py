@@ -2,6 +2,8 @@
 Unit tests for authentication routes.
 """
 import pytest
+from flask import g
+from app.models import User
 
 
 def test_login_page_loads(client):
@@ -30,6 +32,18 @@ def test_successful_registration(client, init_database):
     assert b'Registration successful' in response.data
 
 
+def test_registration_assigns_namespace(client, init_database):
+    """Test registration stores the user's Kubernetes namespace."""
+    client.post('/auth/register', data={
+        'email': 'newuser@example.com',
+        'password': 'password123',
+        'password_confirm': 'password123'
+    })
+
+    user = User.query.filter_by(email='newuser@example.com').first()
+    assert user.k8s_namespace == f'user-{user.id}'
+
+
 def test_duplicate_email_registration(client, test_user, init_database):
     """Test registration fails with duplicate email."""
     response = client.post('/auth/register', data={
@@ -51,6 +65,34 @@ def test_successful_login(client, test_user, init_database):
     assert response.status_code == 200
 
 
+def test_login_redirects_to_next_page(client, test_user, init_database):
+    """Test login follows a local next parameter."""
+    response = client.post('/auth/login?next=/servers/create', data={
+        'email': test_user.email,
+        'password': 'password123'
+    })
+
+    assert response.status_code == 302
+    assert response.headers['Location'] == '/servers/create'
+
+
+@pytest.mark.parametrize('next_page', [
+    '//evil.example.com',
+    'https://evil.example.com/',
+    '/\\evil.example.com',
+    'servers/create',
+])
+def test_login_rejects_external_next_page(client, test_user, init_database, next_page):
+    """Test login ignores next parameters pointing off-site."""
+    response = client.post('/auth/login', query_string={'next': next_page}, data={
+        'email': test_user.email,
+        'password': 'password123'
+    })
+
+    assert response.status_code == 302
+    assert response.headers['Location'] == '/servers/dashboard'
+
+
 def test_failed_login_wrong_password(client, test_user, init_database):
     """Test login fails with wrong password."""
     response = client.post('/auth/login', data={
@@ -69,3 +111,26 @@ def test_failed_login_nonexistent_user(client, init_database):
     }, follow_redirects=True)
 
     assert b'Invalid email or password' in response.data
+
+
+def test_user_loaded_once_per_request(app, client, test_user, init_database, monkeypatch):
+    """Test the user loader runs once per request, not per current_user access."""
+    client.post('/auth/login', data={
+        'email': test_user.email,
+        'password': 'password123'
+    })
+
+    calls = []
+    user_callback = app.login_manager._user_callback
+
+    def counting_loader(user_id):
+        calls.append(user_id)
+        return user_callback(user_id)
+
+    monkeypatch.setattr(app.login_manager, '_user_callback', counting_loader)
+    # init_database keeps one app context open, so drop the user cached by the login request
+    g.pop('_login_user', None)
+
+    response = client.get('/')
+    assert response.status_code == 200
+    assert len(calls) == 1
@@ -0,0 +1,64 @@
+"""
+Unit tests for file management helpers.
+"""
+import pytest
+from app.files.routes import _valid_path, parse_find_output
+
+
+def test_parse_find_output():
+    """Test find -printf records are parsed into file entries."""
+    output = (
+        'f\t1234\t2024-01-02 03:04:05.1234567890\t-rw-r--r--\tserver.properties\0'
+        'd\t4096\t2024-01-02 03:04:05.0000000000\tdrwxr-xr-x\tworld\0'
+    )
+
+    files_list = parse_find_output(output)
+
+    assert files_list == [
+        {
+            'name': 'server.properties',
+            'is_dir': False,
+            'size': 1234,
+            'modified': '2024-01-02 03:04:05',
+            'permissions': '-rw-r--r--'
+        },
+        {
+            'name': 'world',
+            'is_dir': True,
+            'size': 0,
+            'modified': '2024-01-02 03:04:05',
+            'permissions': 'drwxr-xr-x'
+        },
+    ]
+
+
+def test_parse_find_output_keeps_spaces_in_names():
+    """Test file names containing spaces and tabs survive parsing."""
+    output = 'f\t10\t2024-01-02 03:04:05.0\t-rw-r--r--\tmy world\tbackup.zip\0'
+
+    files_list = parse_find_output(output)
+
+    assert files_list[0]['name'] == 'my world\tbackup.zip'
+
+
+def test_parse_find_output_skips_malformed_records():
+    """Test error output and empty results produce no entries."""
+    assert parse_find_output('') == []
+    assert parse_find_output("find: '/missing': No such file or directory\n") == []
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/data', True),
+    ('/data/world/level.dat', True),
+    ('/data/..hidden', True),
+    ('/data/../etc/passwd', False),
+    ('/data/..', False),
+    ('../data', False),
+    ('data/server.properties', False),
+    ('/data/\x00', False),
+    ('', False),
+    (None, False),
+])
+def test_valid_path(path, expected):
+    """Test path validation rejects traversal, relative paths and NUL bytes."""
+    assert _valid_path(path) is expected
@@ -0,0 +1,331 @@
+"""
+Unit tests for the Kubernetes client wrapper (API calls are mocked).
+"""
+from unittest.mock import MagicMock
+import orjson
+import pytest
+from kubernetes.client.rest import ApiException
+from app.servers import kubernetes_client
+from app.servers.kubernetes_client import KubernetesClient, ServerNames
+
+
+@pytest.fixture
+def k8s_client():
+    """KubernetesClient with mocked API handles."""
+    k8s = KubernetesClient()
+    k8s.core_api = MagicMock()
+    k8s.apps_api = MagicMock()
+    k8s.stream_api = MagicMock()
+    return k8s
+
+
+SERVER_CONFIG = {
+    'server_type': 'paper',
+    'server_version': '1.20.1',
+    'cpu_cores': 2,
+    'ram_mb': 4096,
+    'disk_gb': 20
+}
+
+
+def test_create_minecraft_server(k8s_client):
+    """Test server creation submits the StatefulSet and Service."""
+    k8s_client.core_api.create_namespaced_service.return_value.metadata.name = 'mc-1-test'
+
+    result = k8s_client.create_minecraft_server('mc-1-test', SERVER_CONFIG, namespace='user-1')
+
+    assert result == {
+        'pvc_name': 'data-mc-1-test-0',
+        'pod_name': 'mc-1-test-0',
+        'service_name': 'mc-1-test',
+        'namespace': 'user-1'
+    }
+    k8s_client.apps_api.create_namespaced_stateful_set.assert_called_once()
+    k8s_client.core_api.create_namespaced_service.assert_called_once()
+
+
+def test_create_minecraft_server_cleans_up_half_created(k8s_client):
+    """Test the Service is deleted again when the StatefulSet create fails."""
+    k8s_client.apps_api.create_namespaced_stateful_set.side_effect = ApiException(status=403)
+
+    with pytest.raises(ApiException):
+        k8s_client.create_minecraft_server('mc-1-test', SERVER_CONFIG, namespace='user-1')
+
+    k8s_client.core_api.delete_namespaced_service.assert_called_once_with(name='mc-1-test', namespace='user-1')
+    k8s_client.apps_api.delete_namespaced_stateful_set.assert_not_called()
+
+
+def test_create_minecraft_server_cleans_up_statefulset(k8s_client):
+    """Test the StatefulSet and its claim are deleted again when the Service create fails."""
+    k8s_client.core_api.create_namespaced_service.side_effect = ApiException(status=409)
+
+    with pytest.raises(ApiException):
+        k8s_client.create_minecraft_server('mc-1-test', SERVER_CONFIG, namespace='user-1')
+
+    k8s_client.apps_api.delete_namespaced_stateful_set.assert_called_once_with(
+        name='mc-1-test', namespace='user-1')
+    k8s_client.core_api.delete_namespaced_persistent_volume_claim.assert_called_once_with(
+        name='data-mc-1-test-0', namespace='user-1')
+    k8s_client.core_api.delete_namespaced_service.assert_not_called()
+
+
+def test_create_namespace_checked_once(k8s_client):
+    """Test a namespace known to exist isn't looked up again."""
+    k8s_client.create_namespace('user-1')
+    k8s_client.create_namespace('user-1')
+
+    k8s_client.core_api.read_namespace.assert_called_once_with(name='user-1')
+
+
+def test_get_server_logs_streams_chunks(k8s_client):
+    """Test logs are read in chunks without splitting multi-byte characters."""
+    data = 'Done (1.2s)! Für Spieler\n'.encode('utf-8')
+    response = k8s_client.core_api.read_namespaced_pod_log.return_value
+    response.stream.return_value = iter([data[:15], data[15:]])
+
+    logs = k8s_client.get_server_logs('mc-1-test-0', 'user-1', tail_lines=50)
+
+    assert logs == 'Done (1.2s)! Für Spieler\n'
+    kwargs = k8s_client.core_api.read_namespaced_pod_log.call_args.kwargs
+    assert kwargs['_preload_content'] is False
+    assert kwargs['tail_lines'] == 50
+    assert kwargs['limit_bytes'] == 65536
+    response.release_conn.assert_called_once()
+
+
+def test_write_file_uses_stdin(k8s_client):
+    """Test file content is sent on stdin rather than embedded in the command."""
+    k8s_client._exec_with_stdin = MagicMock(return_value='')
+
+    k8s_client.write_file('mc-1-test-0', '/data/server.properties', "motd='hi' $(id)", 'user-1')
+
+    _, command, data, _ = k8s_client._exec_with_stdin.call_args.args
+    assert data == b"motd='hi' $(id)"
+    assert command[-2:] == [str(len(data)), '/data/server.properties']
+    assert all("motd" not in arg for arg in command)
+
+
+def test_statefulset_template_not_shared(k8s_client):
+    """Test servers on the same plan get their own names in the StatefulSet body."""
+    k8s_client._create_statefulset(ServerNames.for_server('mc-1-a'), SERVER_CONFIG, 'user-1')
+    k8s_client._create_statefulset(ServerNames.for_server('mc-2-b'), SERVER_CONFIG, 'user-1')
+
+    first, second = [call.kwargs['body'] for call in
+                     k8s_client.apps_api.create_namespaced_stateful_set.call_args_list]
+    assert first['metadata']['name'] == 'mc-1-a'
+    assert second['metadata']['name'] == 'mc-2-b'
+    assert first['spec']['template']['metadata']['labels']['server'] == 'mc-1-a'
+    assert second['spec']['selector']['matchLabels']['server'] == 'mc-2-b'
+    assert first['spec']['template']['spec'] == second['spec']['template']['spec']
+
+
+def test_pvc_name_matches_claim_template():
+    """Test the derived PVC name is the one the StatefulSet controller creates."""
+    manifest = kubernetes_client._build_statefulset_manifest('image', 'paper', '1.20.1', 2, 4096, 20)
+    template = manifest['spec']['volumeClaimTemplates'][0]['metadata']['name']
+
+    assert ServerNames.for_server('mc-1-test').pvc_name == f"{template}-mc-1-test-0"
+
+
+def test_get_server_status_from_watch(k8s_client):
+    """Test watched pods are answered from memory and others fall back to a read."""
+    k8s_client._ensure_pod_watch = MagicMock(return_value={'mc-1-test-0': 'Running'})
+    k8s_client.core_api.read_namespaced_pod_status.return_value.data = orjson.dumps({'status': {'phase': 'Pending'}})
+
+    assert k8s_client.get_server_status('mc-1-test-0', 'user-1') == 'Running'
+    k8s_client.core_api.read_namespaced_pod_status.assert_not_called()
+
+    assert k8s_client.get_server_status('mc-2-test-0', 'user-1') == 'Pending'
+    k8s_client.core_api.read_namespaced_pod_status.assert_called_once_with(
+        name='mc-2-test-0', namespace='user-1', _preload_content=False)
+
+
+def test_get_server_status_missing_pod(k8s_client):
+    """Test a pod that doesn't exist is reported without an error and cached."""
+    k8s_client._ensure_pod_watch = MagicMock(return_value={})
+    k8s_client.core_api.read_namespaced_pod_status.side_effect = ApiException(status=404)
+
+    assert k8s_client.get_server_status('mc-1-test-0', 'user-1') == 'Unknown'
+    assert k8s_client.get_server_status('mc-1-test-0', 'user-1') == 'Unknown'
+    k8s_client.core_api.read_namespaced_pod_status.assert_called_once()
+
+
+def test_delete_server_attempts_every_resource(k8s_client):
+    """Test a failed delete doesn't stop the other resources being deleted."""
+    k8s_client.apps_api.delete_namespaced_stateful_set.side_effect = ApiException(status=404)
+
+    with pytest.raises(ApiException):
+        k8s_client.delete_server('mc-1-test', 'user-1')
+
+    k8s_client.core_api.delete_namespaced_service.assert_called_once_with(name='mc-1-test', namespace='user-1')
+    k8s_client.core_api.delete_namespaced_persistent_volume_claim.assert_called_once_with(
+        name='data-mc-1-test-0', namespace='user-1')
+
+
+def test_repeated_start_patches_every_time(k8s_client):
+    """Test a repeated start still patches, since another worker may have stopped the server."""
+    k8s_client.start_server('mc-1-test', 'user-1')
+    k8s_client.start_server('mc-1-test', 'user-1')
+    k8s_client.stop_server('mc-1-test', 'user-1')
+
+    assert k8s_client.apps_api.patch_namespaced_stateful_set.call_count == 3
+    assert k8s_client.apps_api.patch_namespaced_stateful_set.call_args.kwargs['body'] == {'spec': {'replicas': 0}}
+
+
+class FakeShell:
+    """Stands in for an exec stream running sh, echoing each command's marker."""
+
+    def __init__(self):
+        self.commands = []
+        self.pending = ''
+
+    def update(self, timeout=0):
+        pass
+
+    def is_open(self):
+        return True
+
+    def write_stdin(self, script):
+        self.commands.append(script)
+        marker = script.rsplit('echo ', 1)[1]
+        self.pending += f"output {len(self.commands)}\n{marker}"
+
+    def read_stdout(self, timeout=None):
+        data, self.pending = self.pending, ''
+        return data
+
+    def read_all(self):
+        return ''
+
+    def close(self):
+        pass
+
+
+def test_exec_command_reuses_shell_session(k8s_client, monkeypatch):
+    """Test consecutive commands in a pod share one exec stream."""
+    shell = FakeShell()
+    open_stream = MagicMock(return_value=shell)
+    monkeypatch.setattr(kubernetes_client, 'stream', open_stream)
+
+    assert k8s_client.exec_command('mc-1-test-0', ['cat', '/data/a b.txt'], 'user-1') == 'output 1\n'
+    assert k8s_client.exec_command('mc-1-test-0', ['ls', '/data'], 'user-1') == 'output 2\n'
+
+    open_stream.assert_called_once()
+    assert shell.commands[0].startswith("cat '/data/a b.txt' </dev/null 2>&1; echo ")
+
+
+def test_list_server_statuses_follows_pages(k8s_client):
+    """Test every page of the pod listing is collected."""
+    first, second = MagicMock(), MagicMock()
+    first.data = orjson.dumps({
+        'metadata': {'continue': 'token'},
+        'items': [{'metadata': {'name': 'mc-1-a-0'}, 'status': {'phase': 'Running'}}]
+    })
+    second.data = orjson.dumps({
+        'metadata': {},
+        'items': [{'metadata': {'name': 'mc-2-b-0'}, 'status': {'phase': 'Pending'}}]
+    })
+    k8s_client.core_api.list_namespaced_pod.side_effect = [first, second]
+
+    assert k8s_client.list_server_statuses('user-1') == {'mc-1-a-0': 'Running', 'mc-2-b-0': 'Pending'}
+    assert k8s_client.core_api.list_namespaced_pod.call_args.kwargs['_continue'] == 'token'
+
+
+def test_get_statuses_for_selected_pods(k8s_client):
+    """Test only the requested pods are returned, lowercased."""
+    k8s_client._ensure_pod_watch = MagicMock(return_value={})
+    k8s_client.list_server_statuses = MagicMock(return_value={'mc-1-a-0': 'Running', 'mc-2-b-0': 'Failed'})
+
+    assert k8s_client.get_statuses_for('user-1', ['mc-1-a-0', 'mc-3-c-0']) == {'mc-1-a-0': 'running'}
+
+
+def test_synced_watch_answers_without_api_calls(k8s_client):
+    """Test a namespace loaded by its watch is served entirely from memory."""
+    k8s_client._ensure_pod_watch = MagicMock(return_value={'mc-1-a-0': 'Running'})
+    k8s_client._pod_watch_synced.add('user-1')
+    k8s_client.list_server_statuses = MagicMock()
+
+    assert k8s_client.get_statuses_for('user-1', ['mc-1-a-0']) == {'mc-1-a-0': 'running'}
+    assert k8s_client.get_server_status('mc-2-b-0', 'user-1') == 'Unknown'
+    k8s_client.list_server_statuses.assert_not_called()
+    k8s_client.core_api.read_namespaced_pod_status.assert_not_called()
+
+
+def test_idle_pod_watch_stops(k8s_client, monkeypatch):
+    """Test a namespace's watch stops and is forgotten once nobody looks it up."""
+    k8s_client.list_server_statuses = MagicMock(return_value={})
+    phases = k8s_client._pod_phases['user-1'] = {'mc-1-a-0': 'Running'}
+    k8s_client._pod_watch_synced.add('user-1')
+    k8s_client._pod_watch_used['user-1'] = 1000.0
+
+    monkeypatch.setattr(kubernetes_client.time, 'monotonic', lambda: 1000.0 + 10)
+    assert not k8s_client._stop_idle_pod_watch('user-1', phases)
+
+    monkeypatch.setattr(kubernetes_client.time, 'monotonic',
+                        lambda: 1000.0 + kubernetes_client.POD_WATCH_IDLE)
+    k8s_client._watch_pods('user-1', phases)
+
+    k8s_client.list_server_statuses.assert_not_called()
+    assert 'user-1' not in k8s_client._pod_phases
+    assert 'user-1' not in k8s_client._pod_watch_synced
+    assert 'user-1' not in k8s_client._pod_watch_used
+
+
+def test_server_status_read_cached_until_state_change(k8s_client):
+    """Test a status read is reused until the server is started or stopped."""
+    k8s_client._ensure_pod_watch = MagicMock(return_value={})
+    k8s_client.core_api.read_namespaced_pod_status.return_value.data = orjson.dumps({'status': {'phase': 'Pending'}})
+
+    assert k8s_client.get_server_status('mc-1-test-0', 'user-1') == 'Pending'
+    assert k8s_client.get_server_status('mc-1-test-0', 'user-1') == 'Pending'
+    k8s_client.core_api.read_namespaced_pod_status.assert_called_once()
+
+    k8s_client.stop_server('mc-1-test', 'user-1')
+    k8s_client.get_server_status('mc-1-test-0', 'user-1')
+    assert k8s_client.core_api.read_namespaced_pod_status.call_count == 2
+
+
+def test_restart_server_single_patch(k8s_client):
+    """Test a restart is one patch that scales up and bumps the pod template."""
+    k8s_client.restart_server('mc-1-test', 'user-1')
+
+    k8s_client.apps_api.patch_namespaced_stateful_set.assert_called_once()
+    body = k8s_client.apps_api.patch_namespaced_stateful_set.call_args.kwargs['body']
+    assert body['spec']['replicas'] == 1
+    assert 'kubectl.kubernetes.io/restartedAt' in body['spec']['template']['metadata']['annotations']
+
+
+def test_exhausted_retries_raise_api_exception():
+    """Test a status that is still failing after the last retry surfaces as ApiException."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from kubernetes import client
+    import threading
+
+    requests = []
+
+    class Unavailable(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Unavailable)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        configuration = client.Configuration()
+        configuration.host = f'http://127.0.0.1:{server.server_port}'
+        configuration.retries = kubernetes_client.API_RETRY.new(backoff_factor=0)
+        core_api = client.CoreV1Api(client.ApiClient(configuration))
+
+        with pytest.raises(ApiException) as excinfo:
+            core_api.read_namespaced_pod_status(name='mc-1-test-0', namespace='user-1')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert excinfo.value.status == 503
+    assert len(requests) == kubernetes_client.API_RETRY.total + 1
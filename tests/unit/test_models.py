@@ -2,6 +2,7 @@
 Unit tests for database models.
 """
 import pytest
+from werkzeug.security import generate_password_hash
 from app.models import User, Server
 
 
@@ -13,6 +14,53 @@ def test_user_password_hashing(test_user):
     assert not test_user.check_password('wrongpassword')
 
 
+def test_user_password_uses_argon2(test_user):
+    """Test new passwords are hashed with Argon2id."""
+    assert test_user.password_hash.startswith('$argon2id$')
+
+
+def test_user_password_cost_from_config(app, test_user, monkeypatch):
+    """Test Argon2 costs come from config and outdated hashes are rehashed."""
+    assert '$m=8,t=1,p=1$' in test_user.password_hash
+
+    monkeypatch.setitem(app.config, 'ARGON2_TIME_COST', 2)
+    assert test_user.check_password('password123')
+    assert '$m=8,t=2,p=1$' in test_user.password_hash
+
+
+def test_user_legacy_password_hash_upgraded(test_user):
+    """Test a werkzeug hash still verifies and is upgraded to Argon2."""
+    test_user.password_hash = generate_password_hash('legacy-password')
+
+    assert not test_user.check_password('wrongpassword')
+    assert not test_user.password_hash.startswith('$argon2')
+
+    assert test_user.check_password('legacy-password')
+    assert test_user.password_hash.startswith('$argon2id$')
+    assert test_user.check_password('legacy-password')
+
+
+def test_user_password_verify_cache(app, test_user, monkeypatch):
+    """Test repeat password checks are served from the verify cache when enabled."""
+    import app.models as models
+
+    calls = []
+    real_verify = models.User._verify_password
+
+    def counting_verify(user, password):
+        calls.append(password)
+        return real_verify(user, password)
+
+    monkeypatch.setitem(app.config, 'USE_VERIFY_PASSWORD_CACHE', True)
+    monkeypatch.setattr(models.User, '_verify_password', counting_verify)
+
+    assert test_user.check_password('password123')
+    assert test_user.check_password('password123')
+    assert not test_user.check_password('wrongpassword')
+    assert not test_user.check_password('wrongpassword')
+    assert calls == ['password123', 'wrongpassword']
+
+
 def test_user_resource_usage(test_user, init_database):
     """Test resource usage calculation."""
     usage = test_user.get_resource_usage()
@@ -23,6 +71,27 @@ def test_user_resource_usage(test_user, init_database):
     assert usage['ram_max_mb'] == test_user.max_ram_gb * 1024
 
 
+def test_user_resource_usage_counts_running_servers(test_user, init_database):
+    """Test only running servers count towards CPU and RAM usage."""
+    for name, status in [('a', 'running'), ('b', 'running'), ('c', 'stopped')]:
+        init_database.session.add(Server(
+            name=name,
+            owner_id=test_user.id,
+            server_type='paper',
+            server_version='1.20.1',
+            cpu_cores=2,
+            ram_mb=4096,
+            disk_gb=20,
+            status=status
+        ))
+    init_database.session.commit()
+
+    usage = test_user.get_resource_usage()
+    assert usage['cpu_used'] == 4
+    assert usage['ram_used_mb'] == 8192
+    assert usage['servers_used'] == 3
+
+
 def test_user_can_create_server(test_user):
     """Test quota checking for server creation."""
     can_create, error = test_user.can_create_server(2, 4096)
@@ -46,6 +115,11 @@ def test_server_k8s_name_generation():
     assert len(name) <= 63
 
 
+def test_server_k8s_name_strips_non_ascii():
+    """Test Kubernetes names drop characters outside [a-z0-9-]."""
+    assert Server.generate_k8s_name(7, "Café_Über 2") == 'mc-7-cafber-2'
+
+
 def test_server_to_dict(test_user, init_database):
     """Test server serialization."""
     server = Server(
@@ -0,0 +1,131 @@
+"""
+Unit tests for server management routes (Kubernetes calls are mocked).
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from app.models import Server
+
+
+@pytest.fixture
+def k8s(app):
+    """Mocked KubernetesClient installed as the app's shared client."""
+    k8s = MagicMock()
+    with patch.dict(app.extensions, {'k8s': k8s}):
+        yield k8s
+
+
+def add_server(db, owner, status='creating'):
+    """Add a server with Kubernetes identifiers for owner."""
+    server = Server(
+        name='Test Server',
+        owner_id=owner.id,
+        server_type='paper',
+        server_version='1.20.1',
+        cpu_cores=2,
+        ram_mb=4096,
+        disk_gb=20,
+        namespace='user-1',
+        pod_name='mc-1-test-0',
+        status=status
+    )
+    db.session.add(server)
+    db.session.commit()
+    return server
+
+
+def test_dashboard_data(client, test_user, init_database, k8s, login):
+    """Test the dashboard endpoint returns servers, statuses and usage together."""
+    server = add_server(init_database, test_user)
+    login(client, test_user)
+
+    k8s.get_statuses_for.return_value = {'mc-1-test-0': 'running'}
+    response = client.get('/servers/api/dashboard')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['statuses'] == {str(server.id): 'running'}
+    assert data['servers'][0]['name'] == 'Test Server'
+    assert data['usage']['cpu_used'] == 2
+    assert data['errors'] == {}
+    k8s.get_statuses_for.assert_called_once_with('user-1', ['mc-1-test-0'])
+
+
+def test_dashboard_skips_commit_when_unchanged(client, test_user, init_database, k8s, login):
+    """Test refreshing the dashboard doesn't write when no status changed."""
+    add_server(init_database, test_user, status='running')
+    login(client, test_user)
+
+    k8s.get_statuses_for.return_value = {'mc-1-test-0': 'running'}
+    with patch.object(init_database.session, 'commit') as commit:
+        response = client.get('/servers/dashboard')
+
+    assert response.status_code == 200
+    commit.assert_not_called()
+
+
+def test_create_form_lists_plans(client, test_user, init_database, login):
+    """Test the create form offers every resource plan."""
+    login(client, test_user)
+
+    response = client.get('/servers/create')
+
+    assert response.status_code == 200
+    for plan in ('small', 'medium', 'large'):
+        assert plan.encode() in response.data
+
+
+def test_detail_commits_only_on_change(client, test_user, init_database, k8s, login):
+    """Test viewing a server writes its status only when Kubernetes reports a new one."""
+    server = add_server(init_database, test_user, status='running')
+    login(client, test_user)
+
+    with patch.object(init_database.session, 'commit') as commit:
+        k8s.get_server_status.return_value = 'Running'
+        assert client.get(f'/servers/{server.id}').status_code == 200
+        commit.assert_not_called()
+
+        k8s.get_server_status.return_value = 'Failed'
+        assert client.get(f'/servers/{server.id}').status_code == 200
+        commit.assert_called_once()
+
+
+def test_delete_server(client, test_user, init_database, k8s, login):
+    """Test deleting a server marks it deleting, then removes its resources and row."""
+    server = add_server(init_database, test_user)
+    server.k8s_name = 'mc-1-test'
+    init_database.session.commit()
+    server_id = server.id
+    login(client, test_user)
+
+    deletes = []
+    with patch('app.servers.routes._delete_executor') as executor:
+        executor.submit.side_effect = lambda fn, *args: deletes.append((fn, args))
+        response = client.post(f'/servers/{server_id}/delete')
+
+        assert response.status_code == 200
+        assert init_database.session.get(Server, server_id).status == 'deleting'
+        k8s.delete_server.assert_not_called()
+
+        for fn, args in deletes:
+            fn(*args)
+
+    k8s.delete_server.assert_called_once_with('mc-1-test', 'user-1')
+    init_database.session.expire_all()
+    assert init_database.session.get(Server, server_id) is None
+
+
+def test_stale_delete_is_retried(client, test_user, init_database, k8s, login):
+    """Test a server left 'deleting' by a lost background task is deleted again, once."""
+    server = add_server(init_database, test_user, status='deleting')
+    server.k8s_name = 'mc-1-test'
+    server.updated_at = datetime.utcnow() - timedelta(hours=1)
+    init_database.session.commit()
+    login(client, test_user)
+
+    with patch('app.servers.routes._delete_executor') as executor:
+        assert client.get('/servers/api/dashboard').status_code == 200
+        assert client.get('/servers/api/dashboard').status_code == 200
+
+    executor.submit.assert_called_once()
+    assert executor.submit.call_args.args[2:] == (server.id, 'mc-1-test', 'user-1')